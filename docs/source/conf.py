@@ -11,6 +11,18 @@ import pypandoc
 import geviewer
 
 
+def write_if_changed(path, content):
+    """Writes the file only if its contents would change, so that Sphinx
+    doesn't see an updated modification time and rebuild the page.
+    """
+    if os.path.exists(path):
+        with open(path, 'r') as file:
+            if file.read() == content:
+                return
+    with open(path, 'w') as file:
+        file.write(content)
+
+
 # Produce some .rst files from README.md
 sections = ['about', 'setup', 'usage', 'info']
 lines = [[] for i in range(len(sections))]
@@ -29,13 +41,9 @@ with open('../../README.md', 'r') as file:
         lines[section].append(line)
 
 for i,section in enumerate(sections):
-    with open(section + '.md', 'w') as file:
-        for line in lines[i]:
-            file.write(line)
-
     # pypandoc.download_pandoc()
-    pypandoc.convert_file(section + '.md', 'rst', outputfile=section + '.rst')
-    os.remove(section + '.md')
+    rst = pypandoc.convert_text(''.join(lines[i]), 'rst', format='md')
+    write_if_changed(section + '.rst', rst)
 
 # -- Project information -----------------------------------------------------
 # https://www.sphinx-doc.org/en/master/usage/configuration.html#project-information
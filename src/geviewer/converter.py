@@ -1,10 +1,8 @@
 import sys
 import os
 import argparse
-from tqdm import tqdm
 from pathlib import Path
 from geviewer.utils import check_files, print_banner
-from geviewer.viewer import GeViewer
 
 
 class ProgressBar:
@@ -32,7 +30,11 @@ class ProgressBar:
         """
         if self.interactive:
             if self.pbar is None and self.total > 0:
-                self.pbar = tqdm(total=self.total)
+                # imported here so that --help doesn't pay for loading tqdm
+                from tqdm import tqdm
+                # redraw at most ~200 times so the bar doesn't slow down long tasks
+                self.pbar = tqdm(total=self.total, miniters=max(1, self.total // 200), \
+                                 mininterval=0.2)
             if self.pbar is not None:
                 if self.pbar.n + 1 < self.total:
                     self.pbar.update(1)
@@ -101,8 +103,10 @@ def main():
         if not destination.lower().endswith('.gev'):
             destination += '.gev'
         
+        # imported here so that --help doesn't pay for loading VTK
+        from geviewer.viewer import GeViewer
         viewer = GeViewer()
-        viewer.load_file(file, progress_obj=ProgressBar())
+        viewer.load_file(file, progress_obj=ProgressBar(), use_cache=False)
         viewer.save_session(destination)
 
         print('Success: file saved to {}'.format(destination))
@@ -2,7 +2,6 @@ import os
 import argparse
 from pathlib import Path
 import geviewer
-from geviewer.gui import launch_app
 from geviewer.utils import check_files
 
 
@@ -17,6 +16,8 @@ def main():
     args = parser.parse_args()
 
     if check_files(args.files):
+        # imported here so that --help doesn't pay for loading Qt and VTK
+        from geviewer.gui import launch_app
         launch_app(args.files)
     
 
@@ -27,6 +27,14 @@ from geviewer.viewer import GeViewer
 import geviewer.utils as utils
 
 
+# console messages for toggles, indexed by the state before toggling
+_ON_OFF = ('on.', 'off.')
+
+# console keywords and the colors they are highlighted in
+_KEYWORD_COLORS = {'Warning': 'orange', 'Error': 'red', 'Success': 'green', 'Hint': 'purple'}
+_KEYWORD_RE = re.compile(r'\b({})\b'.format('|'.join(_KEYWORD_COLORS)))
+
+
 class Application(QApplication):
     """A custom application class for the GeViewer application.
     """
@@ -151,13 +159,13 @@ class Window(MainWindow):
         :type files: list of str
         """
 
+        # a single event loop is reused to wait for each file to be loaded
+        loop = QEventLoop()
+        self.file_loaded.connect(loop.quit)
         for file in files:
             self.load_file(file)
-            
-            # wait for the file to be loaded completely
-            loop = QEventLoop()
-            self.file_loaded.connect(loop.quit)
             loop.exec()
+        self.file_loaded.disconnect(loop.quit)
 
     ##############################################################
     # Methods for creating the GUI
@@ -504,7 +512,7 @@ class Window(MainWindow):
 
         This method creates and configures the main menu bar for the application.
         It adds the following menus:
-        - File: Contains actions for opening files, saving, and closing the window.
+        - File: Contains actions for opening files, saving, caching, and closing the window.
         - Edit: Contains actions for clearing the console, copying console content, and clearing meshes.
         - View: Contains actions for toggling visibility of various panels and visual elements.
         - Window: Contains actions for closing the window.
@@ -524,6 +532,9 @@ class Window(MainWindow):
         save_action = file_menu.addAction('Save As...')
         save_action.setShortcut(QKeySequence.Save)
         save_action.triggered.connect(self.save_file_dialog)
+        self.cache_action = QAction('Cache Parsed Files', self, checkable=True)
+        self.cache_action.setChecked(False)
+        file_menu.addAction(self.cache_action)
         close_window_action = file_menu.addAction('Close Window')
         close_window_action.triggered.connect(self.close)
         close_window_action.setShortcut(QKeySequence.Close)
@@ -620,8 +631,9 @@ class Window(MainWindow):
         :type filename: str
         """
         if filename:
-            self.current_file.append(filename)
-            title = self.default_title + ' - ' + str(Path(self.current_file[0]).resolve()) \
+            # the paths are resolved once as they are added
+            self.current_file.append(str(Path(filename).resolve()))
+            title = self.default_title + ' - ' + self.current_file[0] \
                     + ['',' + {} more'.format(len(self.current_file) - 1)][len(self.current_file) > 1]
         else:
             title = self.default_title
@@ -690,29 +702,37 @@ class Window(MainWindow):
         if comp['has_actor']:
             self.viewer.actors[comp['id']].SetVisibility(visibility)
         if 'children' in comp and comp['children']:
-            for child in comp['children']:
-                self.set_visibility_recursive(child, visibility)
+            self.set_visibility_recursive(comp['children'], visibility)
     
 
-    def set_visibility_recursive(self, comp, visibility):
-        """Sets the visibility of a component and all its children recursively.
+    def set_visibility_recursive(self, components, visibility):
+        """Sets the visibility of components and all their children.
 
-        This method sets the visibility of a component and all its children
-        recursively by checking the corresponding checkbox and updating the
-        visibility of the associated actors.
+        This method sets the visibility of the components and all their children
+        by checking the corresponding checkboxes and updating the visibility of
+        the associated actors. The tree is walked with an explicit stack, and
+        signals from the checkboxes are blocked while their states are updated,
+        since otherwise each checkbox would trigger another traversal of the
+        subtree below it.
 
-        :param comp: The component to set visibility for.
-        :type comp: dict
-        :param visibility: The visibility to set for the component.
+        :param components: The components to set visibility for.
+        :type components: list
+        :param visibility: The visibility to set for the components.
         :type visibility: bool
         """
         state = Qt.CheckState.Checked if visibility else Qt.CheckState.Unchecked
-        if comp['has_actor']:
-            self.viewer.actors[comp['id']].SetVisibility(visibility)
-        self.checkbox_mapping[comp['id']].setCheckState(state)
-        if 'children' in comp and comp['children']:
-            for child in comp['children']:
-                self.set_visibility_recursive(child, visibility)
+        actors = self.viewer.actors
+        stack = list(components)
+        while stack:
+            comp = stack.pop()
+            if comp['has_actor']:
+                actors[comp['id']].SetVisibility(visibility)
+            checkbox = self.checkbox_mapping[comp['id']]
+            checkbox.blockSignals(True)
+            checkbox.setCheckState(state)
+            checkbox.blockSignals(False)
+            if 'children' in comp and comp['children']:
+                stack.extend(comp['children'])
 
     ##############################################################
     # Methods for updating the viewer
@@ -743,7 +763,7 @@ class Window(MainWindow):
         attribute of the viewer to the opposite of its current value and
         updating the parallel button.
         """
-        self.print_to_console('Turning parallel projection ' + ['on.','off.'][self.viewer.parallel])
+        self.print_to_console('Turning parallel projection {}'.format(_ON_OFF[self.viewer.parallel]))
         self.viewer.toggle_parallel_projection()
         self.parallel_action.setText('Perspective' if self.viewer.parallel else 'Parallel')
 
@@ -1174,7 +1194,7 @@ class Window(MainWindow):
             else:
                 off_screen_plotter.set_background(self.viewer.bkg_colors[0])
         else:
-            off_screen_plotter.set_background('white')
+            off_screen_plotter.set_background((1., 1., 1.))
 
         if self.depth_peeling_action.isChecked():
             off_screen_plotter.enable_depth_peeling()
@@ -1246,7 +1266,7 @@ class Window(MainWindow):
             else:
                 for checkbox in self.checkbox_mapping.values():
                     checkbox.setCheckState(Qt.CheckState.Unchecked)
-                for mesh_id in list(set(overlapping_meshes)):
+                for mesh_id in set(overlapping_meshes):
                     self.checkbox_mapping[mesh_id].setCheckState(Qt.CheckState.Checked)
                 if not self.viewer.transparent:
                     self.toggle_transparent(print=False)
@@ -1367,7 +1387,8 @@ class Window(MainWindow):
             self.progress_bar.setValue(0)
             self.file_name_changed.emit(file_path)
             self.print_to_console('Loading file: {}\n'.format(file_path))
-            self.worker = Worker(self.load_and_plot, self.progress_bar, filename=file_path)
+            self.worker = Worker(self.load_and_plot, self.progress_bar, filename=file_path, \
+                                 use_cache=self.cache_action.isChecked())
             self.worker.finished.connect(lambda: self.on_file_loaded(start_time))
             self.worker.error_signal.connect(self.global_exception_hook)
             self.worker.finished.connect(self.worker.deleteLater)
@@ -1375,15 +1396,18 @@ class Window(MainWindow):
             self.worker.start()
 
 
-    def load_and_plot(self, progress_obj, filename):
+    def load_and_plot(self, progress_obj, filename, use_cache=False):
         """The function to call when a file is loaded.
 
         :param progress_obj: The progress object to use.
         :type progress_obj: ProgressBar
         :param filename: The path to the file to load.
         :type filename: str
+        :param use_cache: Whether to read from and write to the cache.
+        :type use_cache: bool, optional
         """
-        self.viewer.load_file(filename=filename, progress_obj=progress_obj, off_screen=False)
+        self.viewer.load_file(filename=filename, progress_obj=progress_obj, off_screen=False, \
+                              use_cache=use_cache)
         self.viewer.create_plotter(progress_obj=progress_obj)
 
 
@@ -1509,7 +1533,7 @@ class Window(MainWindow):
         of the viewer to the opposite of its current value and updating the
         background button.
         """
-        self.print_to_console('Toggling background ' + ['on.','off.'][self.viewer.bkg_on])
+        self.print_to_console('Toggling background {}'.format(_ON_OFF[self.viewer.bkg_on]))
         self.viewer.toggle_background()
         self.viewer.plotter.update()
 
@@ -1521,7 +1545,7 @@ class Window(MainWindow):
         of the viewer to the opposite of its current value and updating the
         background color of the viewer.
         """
-        self.print_to_console('Toggling gradient ' + ['on.','off.'][self.viewer.gradient])
+        self.print_to_console('Toggling gradient {}'.format(_ON_OFF[self.viewer.gradient]))
         self.viewer.gradient = not self.viewer.gradient
         self.viewer.set_background_color()
 
@@ -1548,7 +1572,7 @@ class Window(MainWindow):
         :type button: int
         """
         if button == 2:
-            self.viewer.bkg_colors = ['lightskyblue', 'midnightblue']
+            self.viewer.reset_background_colors()
             self.print_to_console('Resetting background color.')
         else:
             color = QColorDialog.getColor()
@@ -1641,10 +1665,8 @@ class ConsoleRedirect(io.StringIO):
         prompt = QDateTime.currentDateTime().toString('[yyyy-MM-dd HH:mm:ss]: ')
         text = text.replace('[geviewer-prompt]: ', '<b style="color: blue;">{}</b>'.format(prompt))
         text = text.replace('\n', '<br>')
-        text = re.sub(r'\b(Warning)\b', r'<b style="color: orange;">\1</b>', text)
-        text = re.sub(r'\b(Error)\b', r'<b style="color: red;">\1</b>', text)
-        text = re.sub(r'\b(Success)\b', r'<b style="color: green;">\1</b>', text)
-        text = re.sub(r'\b(Hint)\b', r'<b style="color: purple;">\1</b>', text)
+        text = _KEYWORD_RE.sub(lambda match: '<b style="color: {};">{}</b>'\
+                               .format(_KEYWORD_COLORS[match.group(1)], match.group(1)), text)
         return text
 
 
@@ -2,13 +2,29 @@ import numpy as np
 import pyvista as pv
 from lxml import etree
 import re
+import bisect
+import os
+import mmap
 import uuid
 import time
 import threading
+import multiprocessing
+import collections
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 from geviewer import geometry
 
 
+# matches any integer or decimal number
+_NUM_RE = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
+# match the fields of a VRML viewpoint block
+_FOV_RE = re.compile(r'fieldOfView\s+([\d.]+)')
+_POSITION_RE = re.compile(r'position\s+([\d.-]+)\s+([\d.-]+)\s+([\d.-]+)')
+_ORIENTATION_RE = re.compile(r'orientation\s+([\d.-]+)\s+([\d.-]+)\s+([\d.-]+)\s+([\d.-]+)')
+
+
 class Parser:
     """Base class for all parsers.
     """
@@ -35,12 +51,14 @@ class Parser:
                  'is_event': False, 'mesh': None, 'has_actor': False, 'children': []}
     
     
-    def combine_mesh_arrays(self, points, cells, colors):
+    def combine_mesh_arrays(self, points, cells, colors, lengths=None):
         """Combines multiple mesh arrays into a single mesh.
 
         This function takes lists of points, indices of faces or line segments
         (called cells), and colors, and combines them into a single set of points,
-        cells, and colors, adjusting indices appropriately.
+        cells, and colors, adjusting indices appropriately. Each output array
+        is allocated once at its final size, so peak memory is bounded by the
+        inputs plus the combined outputs.
 
         :param points: A list of arrays containing point coordinates.
         :type points: list of numpy.ndarray
@@ -48,49 +66,114 @@ class Parser:
         :type cells: list of list
         :param colors: A list of arrays containing color data.
         :type colors: list of numpy.ndarray
+        :param lengths: A list of arrays containing the number of points in each
+            cell. If not provided, they are read from the cell arrays.
+        :type lengths: list of numpy.ndarray, optional
         :return: The combined points, cells, and colors.
         :rtype: tuple
         """
 
         offsets = np.cumsum([0] + [len(p) for p in points[:-1]]).astype(int)
         points = np.concatenate(points)
-        
-        for i, cell in enumerate(cells):
-            j = 0
-            while j < len(cell):
-                k = int(cell[j])
-                start_idx = j + 1
-                end_idx = j + k + 1
-                
-                cell[start_idx:end_idx] = (np.array(cell[start_idx:end_idx]) + int(offsets[i])).tolist()
-                j += k + 1
-        
-        cells = np.concatenate(cells).astype(int)
+
+        # fill a single preallocated cell array, shifting every entry by the
+        # point offset and then restoring the cell sizes
+        cells = [np.asarray(cell) for cell in cells]
+        if lengths is None:
+            lengths = [self.find_cell_lengths(cell) for cell in cells]
+        cell_offsets = np.cumsum([0] + [len(c) for c in cells])
+        combined = np.empty(cell_offsets[-1], dtype=pv.ID_TYPE)
+        for cell, length, offset, start in zip(cells, lengths, offsets, cell_offsets[:-1]):
+            out = combined[start:start + len(cell)]
+            np.add(cell, offset, out=out, casting='unsafe')
+            starts = np.cumsum(length + 1) - (length + 1)
+            out[starts] = cell[starts]
+
+        cells = combined
         colors = np.concatenate(colors)
 
         return points, cells, colors
 
 
+    def build_cell_array(self, lengths):
+        """Builds a flat cell array for cells made of consecutive points.
+
+        The cell array has the form [n0, 0, 1, ..., n1, n0, n0 + 1, ...], where
+        each cell size is followed by the indices of that many points. It is
+        constructed with NumPy rather than by extending a list for each cell.
+
+        :param lengths: The number of points in each cell.
+        :type lengths: numpy.ndarray
+        :return: The flat cell array.
+        :rtype: numpy.ndarray
+        """
+        lengths = np.asarray(lengths, dtype=int)
+        starts = np.cumsum(lengths + 1) - (lengths + 1)
+        cells = np.empty(lengths.sum() + len(lengths), dtype=int)
+        is_index = np.ones(len(cells), dtype=bool)
+        is_index[starts] = False
+        cells[starts] = lengths
+        cells[is_index] = np.arange(lengths.sum())
+        return cells
+
+
+    def find_cell_lengths(self, cells):
+        """Finds the number of points in each cell of a flat cell array.
+
+        Cell arrays have the form [n0, i0, i1, ..., n1, j0, j1, ...], where each
+        cell size is followed by that many point indices. The array is read by
+        VTK, so cells of mixed sizes are handled without a Python loop.
+
+        :param cells: The flat cell array.
+        :type cells: numpy.ndarray
+        :return: The number of points in each cell.
+        :rtype: numpy.ndarray
+        """
+        if len(cells) == 0:
+            return np.array([], dtype=int)
+        cell_array = pv.CellArray(np.asarray(cells, dtype=pv.ID_TYPE))
+        return np.diff(pv.convert_array(cell_array.GetOffsetsArray()))
+
+
 class VRMLParser(Parser):
     """Parser for VRML files.
     """
 
-    def parse_file(self, progress_obj=None):
+    #: The number of blocks sent to each worker process when parsing large files
+    chunk_size = 1000
+
+    #: The file size in bytes above which the blocks are processed in worker processes.
+    #: Starting each worker costs about half a second of imports, while the blocks are
+    #: processed serially at roughly 40-50 MB/s, so smaller files parse faster in-process
+    parallel_min_size = 1 << 26
+
+    #: The reference sphere glyphed onto the step markers, built on first use
+    unit_sphere = None
+
+    def parse_file(self, progress_obj=None, parallel=True):
         """Parses the VRML file and creates the meshes.
 
         :param progress_obj: The progress object to use.
         :type progress_obj: geviewer.gui.GeProgressBar, optional
+        :param parallel: If True, files larger than `parallel_min_size` are processed
+            in worker processes when more than one CPU is available. Defaults to True.
+        :type parallel: bool, optional
         """
-        update = 'Reading VRML file...\n'
+        update = 'Parsing VRML file...\n'
         if progress_obj:
             if progress_obj.sync_status(update=update): return
         else:
             print(update)
-        data = self.read_file(self.filename)
-        viewpoint_block, polyline_blocks, marker_blocks, solid_blocks = self.extract_blocks(data, progress_obj=progress_obj)
-        self.viewpoint_block = viewpoint_block
-        now = time.time()
-        polyline_mesh, marker_mesh, solid_mesh = self.create_meshes(polyline_blocks, marker_blocks, solid_blocks, progress_obj=progress_obj)
+        self.viewpoint_block = None
+        # worker processes never start pools of their own
+        parallel = parallel and multiprocessing.parent_process() is None \
+                   and (os.cpu_count() or 1) > 1 \
+                   and os.path.getsize(self.filename) >= self.parallel_min_size
+        blocks = self.iter_blocks(self.filename, progress_obj=progress_obj)
+        meshes = self.create_meshes(blocks, progress_obj=progress_obj, parallel=parallel)
+        if meshes is None:
+            return
+        polyline_mesh, marker_mesh, solid_mesh = meshes
         component_name = self.filename.split('/')[-1].split('.')[0]
         component = self.initialize_template(component_name)
         names = ['Trajectories', 'Step Markers', 'Geometry']
@@ -104,54 +187,269 @@ class VRMLParser(Parser):
         self.components = component
 
 
-    def read_file(self, filename):
-        """Reads the content of a file.
+    def iter_blocks(self, filename, progress_obj=None):
+        """Streams polyline, marker, solid, and viewpoint blocks from a VRML file.
+
+        The file is memory-mapped and scanned as bytes, jumping directly between
+        block keywords and braces, so the full file is never decoded or held in
+        memory. Each block is decoded and yielded as soon as its closing brace
+        is found.
 
         :param filename: The path to the file to read.
         :type filename: str
-        :return: A single string containing the content of the file.
+        :param progress_obj: The progress object to use.
+        :type progress_obj: geviewer.gui.GeProgressBar, optional
+        :return: A generator of tuples containing the block type (one of
+            `'polyline'`, `'marker'`, `'solid'`, or `'viewpoint'`) and the block
+            content as a string.
+        :rtype: generator
+        """
+        size = os.path.getsize(filename)
+        if size == 0:
+            return
+
+        # report progress in steps of 0.1% of the file size
+        progress_step = max(1, size // 1000)
+        if progress_obj:
+            progress_obj.reset_progress()
+            progress_obj.set_maximum_value(size // progress_step)
+        steps_done = 0
+
+        with open(filename, 'rb') as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                braces = self.find_braces(buf)
+                keywords = (b'Shape', b'Anchor', b'Viewpoint')
+                next_match = {kw: buf.find(kw) for kw in keywords}
+                pos = 0
+                while True:
+                    # find the next keyword that is the first word on its line
+                    for kw in keywords:
+                        while next_match[kw] != -1 and next_match[kw] < pos:
+                            next_match[kw] = buf.find(kw, next_match[kw] + 1)
+                    found = [i for i in next_match.values() if i != -1]
+                    if not found:
+                        break
+                    start = min(found)
+                    line_start = buf.rfind(b'\n', 0, start) + 1
+                    if buf[line_start:start].strip():
+                        pos = start + 1
+                        continue
+
+                    end = self.find_block_end(buf, start, braces)
+                    if end == -1:
+                        break
+                    pos = end
+
+                    if progress_obj:
+                        while steps_done < pos // progress_step:
+                            steps_done += 1
+                            if progress_obj.sync_status(increment=True): return
+
+                    # classify the block on the raw bytes so that only the
+                    # blocks that are used get decoded
+                    which = self.classify_block(buf, line_start, end)
+                    if which is not None:
+                        yield which, buf[line_start:end].decode('utf-8', errors='replace')
+            finally:
+                buf.close()
+
+        if progress_obj:
+            progress_obj.signal_finished()
+
+
+    def classify_block(self, buf, start, end):
+        """Determines the type of the block spanning the given positions.
+
+        :param buf: The file contents.
+        :type buf: mmap.mmap or bytes
+        :param start: The position at which the block begins.
+        :type start: int
+        :param end: The position at which the block ends.
+        :type end: int
+        :return: The block type, or None if the block is not recognized.
         :rtype: str
         """
-        data = []
-        with open(filename, 'r') as f:
-            for line in f:
-                # don't read comments
-                if not line.strip().startswith('#'):
-                    data.append(line)
-        data = ''.join(data)
-        return data
-    
+        for keyword, which in ((b'IndexedLineSet', 'polyline'), (b'Sphere', 'marker'), \
+                               (b'IndexedFaceSet', 'solid'), (b'Viewpoint', 'viewpoint')):
+            if buf.find(keyword, start, end) != -1:
+                return which
+        return None
 
-    def create_meshes(self, polyline_blocks, marker_blocks, solid_blocks, progress_obj=None):
+
+    def find_braces(self, buf, chunk_size=1 << 26):
+        """Locates every brace in the file and the nesting depth following it.
+
+        The file is scanned with NumPy in fixed-size chunks, so no Python-level
+        work is done per character and the temporary arrays stay bounded in size.
+
+        :param buf: The file contents.
+        :type buf: mmap.mmap or bytes
+        :param chunk_size: The number of bytes to scan at a time.
+        :type chunk_size: int, optional
+        :return: A tuple containing:
+            - `positions`: The sorted positions of all braces.
+            - `depths`: The nesting depth just after each brace.
+            - `closes`: A sorted list of the positions of the closing braces
+            that return the nesting depth to zero.
+        :rtype: tuple
+        """
+        data = np.frombuffer(buf, dtype=np.uint8)
+        positions = []
+        signs = []
+        for offset in range(0, len(data), chunk_size):
+            chunk = data[offset:offset + chunk_size]
+            inds = np.flatnonzero((chunk == ord('{')) | (chunk == ord('}')))
+            positions.append(inds + offset)
+            signs.append(np.where(chunk[inds] == ord('{'), 1, -1).astype(np.int32))
+        # release the view so that the memory map can be closed
+        del data, chunk
+        positions = np.concatenate(positions) if positions else np.array([], dtype=np.int64)
+        signs = np.concatenate(signs) if signs else np.array([], dtype=np.int32)
+        depths = np.cumsum(signs)
+        closes = positions[(depths == 0) & (signs < 0)].tolist()
+        return positions, depths, closes
+
+
+    def find_block_end(self, buf, start, braces=None):
+        """Finds the end of the block beginning at a given position.
+
+        If the brace positions from `find_braces` are provided, blocks that
+        begin at the top level are matched with a binary search. Otherwise, the
+        braces are counted from the start of the block.
+
+        :param buf: The file contents.
+        :type buf: mmap.mmap or bytes
+        :param start: The position at which the block begins.
+        :type start: int
+        :param braces: The brace positions and depths returned by `find_braces`.
+        :type braces: tuple, optional
+        :return: The position just past the line containing the brace that
+            closes the block, or -1 if the block is not closed.
+        :rtype: int
+        """
+        if braces is not None:
+            positions, depths, closes = braces
+            i = positions.searchsorted(start)
+            if i == 0 or depths[i - 1] == 0:
+                j = bisect.bisect_left(closes, start)
+                if j == len(closes):
+                    return -1
+                line_end = buf.find(b'\n', closes[j] + 1)
+                return len(buf) if line_end == -1 else line_end + 1
+
+        depth = 0
+        pos = start
+        next_open = buf.find(b'{', pos)
+        next_close = buf.find(b'}', pos)
+        while next_close != -1:
+            if next_open != -1 and next_open < next_close:
+                depth += 1
+                pos = next_open + 1
+                next_open = buf.find(b'{', pos)
+            else:
+                depth -= 1
+                pos = next_close + 1
+                next_close = buf.find(b'}', pos)
+                if depth <= 0:
+                    line_end = buf.find(b'\n', pos)
+                    return len(buf) if line_end == -1 else line_end + 1
+        return -1
+
+
+    def create_meshes(self, blocks, progress_obj=None, parallel=False):
         """Creates and returns meshes for polylines, markers, and solids.
 
-        This function processes blocks of data for polylines, markers, and solids,
-        building corresponding meshes for each.
+        This function consumes the blocks as they are produced, processing each
+        one immediately so that the raw block text can be discarded, and then
+        builds the corresponding meshes for each block type.
 
-        :param polyline_blocks: List of blocks containing polyline data.
-        :type polyline_blocks: list
-        :param marker_blocks: List of blocks containing marker data.
-        :type marker_blocks: list
-        :param solid_blocks: List of blocks containing solid data.
-        :type solid_blocks: list
+        :param blocks: An iterable of (block type, block content) tuples, as
+            produced by :meth:`iter_blocks`.
+        :type blocks: iterable
         :param progress_obj: The progress object to use.
         :type progress_obj: geviewer.gui.GeProgressBar, optional
+        :param parallel: If True, the blocks are processed in worker processes in
+            chunks of `chunk_size`. If the workers cannot be started, for example
+            when called from a script without a `__main__` guard, the blocks are
+            processed in this process instead. Defaults to False.
+        :type parallel: bool, optional
         :return: The created meshes.
         :rtype: tuple
         """
+        processed = {'polyline': [], 'marker': [], 'solid': []}
+        executor = None
+        # the processed chunks in file order, with a placeholder for each chunk
+        # that is still being processed by a worker
+        results = []
+        # (position, future, chunk) for each chunk sent to a worker, keeping the
+        # chunk so it can be processed here if the worker fails
+        in_flight = collections.deque()
+        max_in_flight = 2*(os.cpu_count() or 1)
+        chunk = []
+
+        def collect():
+            """Stores the result of the oldest chunk sent to a worker."""
+            position, future, sent = in_flight.popleft()
+            try:
+                results[position] = future.result()
+            except (BrokenProcessPool, RuntimeError):
+                results[position] = self.process_blocks(sent)
+
+        try:
+            for which, block in blocks:
+                if which == 'viewpoint':
+                    self.viewpoint_block = block
+                    continue
+                chunk.append((which, block))
+                if len(chunk) == self.chunk_size:
+                    if parallel:
+                        try:
+                            if executor is None:
+                                executor = ProcessPoolExecutor(mp_context=multiprocessing.get_context('spawn'))
+                            in_flight.append((len(results), executor.submit(process_vrml_blocks, chunk), chunk))
+                            results.append(None)
+                        except (BrokenProcessPool, RuntimeError):
+                            parallel = False
+                            results.append(self.process_blocks(chunk))
+                        # wait for the workers so that the block text of at
+                        # most a few chunks per worker is held in memory
+                        while len(in_flight) > max_in_flight:
+                            collect()
+                    else:
+                        results.append(self.process_blocks(chunk))
+                    chunk = []
+            results.append(self.process_blocks(chunk))
+            chunk = []
+            while in_flight:
+                collect()
+        finally:
+            if executor is not None:
+                # cancel the chunks that have not started yet if interrupted
+                for position, future, sent in in_flight:
+                    future.cancel()
+                executor.shutdown()
+
+        for result in results:
+            for which, item in result:
+                processed[which].append(item)
+        polylines = processed['polyline']
+        markers = processed['marker']
+        solids = processed['solid']
+
         update = 'Building meshes...\n'
         if progress_obj:
             if progress_obj.sync_status(update=update): return
         else:
             print(update)
 
-        total = len(polyline_blocks) + len(marker_blocks) + len(solid_blocks)
+        total = len(polylines) + len(markers) + len(solids)
         if progress_obj:
             progress_obj.reset_progress()
             progress_obj.set_maximum_value(total)
-        polyline_mesh = self.build_mesh(polyline_blocks, 'polyline', progress_obj)
-        marker_mesh = self.build_markers(marker_blocks, progress_obj)
-        solid_mesh = self.build_mesh(solid_blocks, 'solid', progress_obj)
+        polyline_mesh = self.build_mesh(polylines, 'polyline', progress_obj)
+        marker_mesh = self.build_markers(markers, progress_obj)
+        solid_mesh = self.build_mesh(solids, 'solid', progress_obj)
 
         if progress_obj:
             progress_obj.signal_finished()
@@ -159,14 +457,14 @@ class VRMLParser(Parser):
         return polyline_mesh, marker_mesh, solid_mesh
 
 
-    def build_mesh(self, blocks, which, progress_obj=None):
-        """Builds a mesh for the given blocks.
+    def build_mesh(self, processed, which, progress_obj=None):
+        """Builds a mesh for the given processed blocks.
 
-        This function processes blocks of data for polylines, markers, and solids,
-        building corresponding meshes for each.
+        This function combines the points, cells, and colors of the processed
+        polyline or solid blocks into a single mesh.
 
-        :param blocks: List of blocks containing data.
-        :type blocks: list
+        :param processed: List of (points, cells, lengths, color) tuples.
+        :type processed: list
         :param which: The type of mesh to build.
         :type which: str
         :param progress_obj: The progress object to use.
@@ -174,142 +472,89 @@ class VRMLParser(Parser):
         :return: The created mesh.
         :rtype: pyvista.PolyData
         """
-        points = [None for i in range(len(blocks))]
-        cells = [None for i in range(len(blocks))]
-        colors = [None for i in range(len(blocks))]
-
-        if which == 'polyline':
-            func = self.process_polyline_block
-        elif which == 'solid':
-            func = self.process_solid_block
+        points = [None for i in range(len(processed))]
+        cells = [None for i in range(len(processed))]
+        lengths = [None for i in range(len(processed))]
+        colors = [None for i in range(len(processed))]
 
-        for i, block in enumerate(blocks):
-            points[i], cells[i], color = func(block)
-            colors[i] = [color]*len(points[i])
+        for i, (pts, cell, length, color) in enumerate(processed):
+            points[i], cells[i], lengths[i], colors[i] = pts, cell, length, color
             if progress_obj:
                 if progress_obj.sync_status(increment=True): return
 
         if len(points) == 0:
             return None
-        
-        points, cells, colors = self.combine_mesh_arrays(points, cells, colors)
-        if func==self.process_polyline_block:
+
+        # expand the per-block colors to per-point colors in one allocation
+        counts = [len(p) for p in points]
+        colors = np.repeat(np.array(colors), counts, axis=0)
+        points, cells, colors = self.combine_mesh_arrays(points, cells, [colors], lengths)
+        if which == 'polyline':
             mesh = pv.PolyData(points, lines=cells)
-        elif func==self.process_solid_block:
+        elif which == 'solid':
             mesh = pv.PolyData(points, faces=cells)
         mesh.point_data.set_scalars(colors, name='color')
 
         return mesh
 
 
-    def build_markers(self, blocks, progress_obj=None):
-        """Builds a mesh for the given blocks.
+    def build_markers(self, processed, progress_obj=None):
+        """Builds a mesh for the given processed marker blocks.
 
-        This function processes blocks of data for markers, creating a mesh for each.
+        A single reference sphere is tessellated once and glyphed onto the
+        marker centers, scaled by each marker's radius, which is much faster
+        than building a separate sphere for each marker.
 
-        :param blocks: List of blocks containing data.
-        :type blocks: list
+        :param processed: List of (center, radius, color) tuples.
+        :type processed: list
         :param progress_obj: The progress object to use.
         :type progress_obj: geviewer.gui.GeProgressBar, optional
         :return: The created mesh.
         :rtype: pyvista.PolyData
         """
-        centers = [None for i in range(len(blocks))]
-        radii = [None for i in range(len(blocks))]
-        colors = [None for i in range(len(blocks))]
-        
-        for i, block in enumerate(blocks):
-            centers[i], radii[i], colors[i] = self.process_marker_block(block)
-        if len(centers) == 0:
+        if len(processed) == 0:
             return None
-        
-        mesh = pv.MultiBlock()
-        for i in range(len(centers)):
-            mesh.append(pv.Sphere(radius=radii[i], center=centers[i]))
-            colors[i] = [colors[i]]*mesh[-1].n_points
-            if progress_obj:
-                if progress_obj.sync_status(increment=True): return
-
-        colors = np.concatenate(colors)
-        mesh = mesh.combine()
-        mesh.point_data.set_scalars(colors, name='color')
-
-        return mesh
 
+        centers, radii, colors = zip(*processed)
+        cloud = pv.PolyData(np.array(centers, dtype=np.float32))
+        cloud['radius'] = np.array(radii, dtype=float)
+        cloud['color'] = np.array(colors)
+        mesh = cloud.glyph(geom=self.get_unit_sphere(), scale='radius', orient=False)
+        mesh.point_data.set_scalars(mesh['color'], name='color')
 
-    def extract_blocks(self, file_content, progress_obj=None):
-        """Extracts polyline, marker, and solid blocks from the given file content.
-
-        This function processes the provided file content, which is expected to
-        be in a text format, and extracts blocks of different types based on
-        specific keywords. It separates the blocks into categories: polyline,
-        marker, and solid blocks, and also identifies the viewpoint block.
-
-        :param file_content: The content of the file as a single string.
-        :type file_content: str
-        :param progress_obj: The progress object to use.
-        :type progress_obj: geviewer.gui.GeProgressBar, optional
-        :return: A tuple containing four elements:
-            - The viewpoint block (if found) as a string or `None` if not found.
-            - A list of polyline blocks as strings.
-            - A list of marker blocks as strings.
-            - A list of solid blocks as strings.
-        :rtype: tuple
-        """
-        update = 'Parsing VRML file...\n'
         if progress_obj:
-            if progress_obj.sync_status(update=update): return
-        else:
-            print(update)
+            for i in range(len(processed)):
+                if progress_obj.sync_status(increment=True): return
 
-        polyline_blocks = []
-        marker_blocks = []
-        solid_blocks = []
-        viewpoint_block = None
+        return mesh
 
-        lines = file_content.split('\n')
-        block = []
-        inside_block = False
-        brace_count = 0
 
-        if progress_obj:
-            progress_obj.reset_progress()
-            progress_obj.set_maximum_value(len(lines))
+    def get_unit_sphere(self):
+        """Returns the reference sphere used for the step markers.
 
-        for i, line in enumerate(lines):
-            stripped_line = line.strip()
+        The sphere is tessellated once and shared by all parsers, since
+        glyphing does not modify it.
 
-            if stripped_line.startswith('Shape') or stripped_line.startswith('Anchor')\
-                or stripped_line.startswith('Viewpoint'):
-                inside_block = True
-                brace_count = 0
-            
-            if inside_block:
-                block.append(line)
-                brace_count += line.count('{') - line.count('}')
-                
-                if brace_count == 0:
-                    block_content = '\n'.join(block)
-                    
-                    if 'IndexedLineSet' in block_content:
-                        polyline_blocks.append(block_content)
-                    elif 'Sphere' in block_content:
-                        marker_blocks.append(block_content)
-                    elif 'IndexedFaceSet' in block_content:
-                        solid_blocks.append(block_content)
-                    elif 'Viewpoint' in block_content:
-                        viewpoint_block = block_content
-
-                    block = []
-                    inside_block = False
+        :return: A sphere of unit radius centered at the origin.
+        :rtype: pyvista.PolyData
+        """
+        if VRMLParser.unit_sphere is None:
+            VRMLParser.unit_sphere = pv.Sphere(radius=1.)
+        return VRMLParser.unit_sphere
 
-            if progress_obj:
-                if progress_obj.sync_status(increment=True): return
 
-        if progress_obj:
-            progress_obj.signal_finished()
+    def process_blocks(self, blocks):
+        """Processes a list of blocks of any type.
 
-        return viewpoint_block, polyline_blocks, marker_blocks, solid_blocks
+        :param blocks: List of (block type, block content) tuples.
+        :type blocks: list
+        :return: List of (block type, processed block) tuples.
+        :rtype: list
+        """
+        funcs = {'polyline': self.process_polyline_block,
+                 'marker': self.process_marker_block,
+                 'solid': self.process_solid_block}
+        return [(which, funcs[which](block)) for which, block in blocks]
 
 
     def process_polyline_block(self, block):
@@ -322,31 +567,35 @@ class VRMLParser(Parser):
         :param block: The polyline block content as a string.
         :type block: str
         :return: A tuple containing:
-            - A `pv.PolyData` object representing the polyline mesh.
+            - The points of the polyline as an array.
+            - The line segments as a flat cell array.
+            - The number of points in each line segment.
             - The color associated with the polyline mesh as a list or array.
         :rtype: tuple
         """
         points, indices, color = self.parse_polyline_block(block)
-        lines = []
-        for i in range(len(indices) - 1):
-            if indices[i] != -1 and indices[i + 1] != -1:
-                lines.extend([2, indices[i], indices[i + 1]])
+        # each pair of consecutive indices not broken by a -1 is a line segment
+        pairs = np.column_stack((indices[:-1], indices[1:]))
+        pairs = pairs[(pairs != -1).all(axis=1)]
+        lengths = np.full(len(pairs), 2)
+        lines = np.column_stack((lengths, pairs)).ravel()
         
-        return points, lines, color
+        return points, lines, lengths, color
 
 
     def process_marker_block(self, block):
-        """Processes a marker block to create a marker mesh.
+        """Processes a marker block to extract the marker geometry.
 
-        This function takes a block of marker data and creates a spherical
-        marker mesh using PyVista. It also extracts the color information
-        associated with the marker.
+        This function takes a block of marker data and extracts the center,
+        radius, and color of the marker. The marker meshes are built together
+        in `build_markers` from a single reference sphere.
 
         :param block: The marker block content as a string.
         :type block: str
         :return: A tuple containing:
-            - A `pv.Sphere` object representing the marker mesh.
-            - The color associated with the marker mesh as a list or array.
+            - The center of the marker as an array of three floats.
+            - The radius of the marker as a float.
+            - The color associated with the marker as an array.
         :rtype: tuple
         """
         center, radius, color = self.parse_marker_block(block)
@@ -364,25 +613,32 @@ class VRMLParser(Parser):
         :param block: The solid block content as a string.
         :type block: str
         :return: A tuple containing:
-            - A `pv.PolyData` object representing the solid mesh.
+            - The points of the solid as an array.
+            - The faces as a flat cell array.
+            - The number of points in each face.
             - The color associated with the solid mesh as a list or array.
         :rtype: tuple
         """
         points, indices, color = self.parse_solid_block(block)
-        faces = []
-        current_face = []
-        for index in indices:
-            if index == -1:
-                if len(current_face) == 3:
-                    faces.extend([3] + current_face)
-                elif len(current_face) == 4:
-                    faces.extend([4] + current_face)
-                current_face = []
-            else:
-                current_face.append(index)
-        faces = np.array(faces)
+        sep = np.flatnonzero(indices == -1)
+        if len(sep) == 0:
+            return points, np.array([], dtype=int), np.array([], dtype=int), color
+
+        # shift the indices right by one so that each face is preceded by the
+        # -1 that terminated the previous face, then overwrite that slot with
+        # the number of vertices to get the [n, i0, i1, ...] layout
+        lengths = np.diff(np.concatenate(([-1], sep))) - 1
+        faces = np.empty(sep[-1] + 1, dtype=indices.dtype)
+        faces[0] = -1
+        faces[1:] = indices[:sep[-1]]
+        faces[sep - lengths] = lengths
 
-        return points, faces, color
+        # only triangles and quadrilaterals are supported
+        supported = np.isin(lengths, (3, 4))
+        owner = np.repeat(np.arange(len(lengths)), lengths + 1)
+        faces = faces[supported[owner]]
+
+        return points, faces, lengths[supported], color
 
 
     def parse_viewpoint_block(self, block):
@@ -407,16 +663,16 @@ class VRMLParser(Parser):
         orientation = None
 
         if block is not None:
-            fov_match = re.search(r'fieldOfView\s+([\d.]+)', block)
+            fov_match = _FOV_RE.search(block)
             if fov_match:
                 fov = float(fov_match.group(1))*180/np.pi
             
-            position_match = re.search(r'position\s+([\d.-]+)\s+([\d.-]+)\s+([\d.-]+)', block)
+            position_match = _POSITION_RE.search(block)
             if position_match:
                 position = [float(position_match.group(1)), float(position_match.group(2)), \
                             float(position_match.group(3))]
 
-            orientation_match = re.search(r'orientation\s+([\d.-]+)\s+([\d.-]+)\s+([\d.-]+)\s+([\d.-]+)', block)
+            orientation_match = _ORIENTATION_RE.search(block)
             if orientation_match:
                 orientation = [float(orientation_match.group(1)), float(orientation_match.group(2)), \
                             float(orientation_match.group(3)), float(orientation_match.group(4))]
@@ -431,7 +687,8 @@ class VRMLParser(Parser):
         This function processes a block of text representing a polyline in a 3D
         scene description. It extracts the coordinates of the points that define
         the polyline, the indices that describe the lines between these points, 
-        and the color associated with the polyline.
+        and the color associated with the polyline. The point and index lists
+        are each parsed with a single call to NumPy rather than line by line.
 
         :param block: The polyline block content as a string.
         :type block: str
@@ -444,39 +701,12 @@ class VRMLParser(Parser):
             polyline, where the alpha is set to 1.
         :rtype: tuple
         """
-        coords = []
-        coord_inds = []
-        color = [1, 1, 1]
-
-        lines = block.split('\n')
-        reading_points = False
-        reading_indices = False
-
-        for line in lines:
-            line = line.strip()
-            if line.startswith('point ['):
-                reading_points = True
-                continue
-            elif line.startswith(']'):
-                reading_points = False
-                reading_indices = False
-                continue
-            elif line.startswith('coordIndex ['):
-                reading_indices = True
-                continue
-            elif 'diffuseColor' in line:
-                color = list(map(float, re.findall(r'[-+]?\d*\.?\d+', line)))
-            if reading_points:
-                point = line.replace(',', '').split()
-                if len(point) == 3:
-                    coords.append(list(map(float, point)))
-            elif reading_indices:
-                indices = line.replace(',', '').split()
-                coord_inds.extend(list(map(int, indices)))
-
+        coords = self.parse_array(block, 'point [', np.float32).reshape(-1, 3)
+        coord_inds = self.parse_array(block, 'coordIndex [', np.int32)
+        color = self.find_values(block, 'diffuseColor', 3) or [1, 1, 1]
         color.append(1.)
 
-        return np.array(coords), np.array(coord_inds), np.array(color)
+        return coords, coord_inds, np.array(color)
 
 
     def parse_marker_block(self, block):
@@ -497,26 +727,10 @@ class VRMLParser(Parser):
             where alpha is adjusted for transparency.
         :rtype: tuple
         """
-        coords = []
-        color = [1, 1, 1]
-        transparency = 0
-        radius = 1
-
-        lines = block.split('\n')
-
-        for line in lines:
-            line = line.strip()
-            if line.startswith('translation'):
-                point = line.split()[1:]
-                if len(point) == 3:
-                    coords = list(map(float, point))
-            elif 'diffuseColor' in line:
-                color = list(map(float, re.findall(r'[-+]?\d*\.?\d+', line)))
-            elif 'transparency' in line:
-                transparency = float(re.findall(r'[-+]?\d*\.?\d+', line)[0])
-            elif 'radius' in line:
-                radius = float(re.findall(r'[-+]?\d*\.?\d+', line)[0])
-
+        coords = self.find_values(block, 'translation', 3) or [0, 0, 0]
+        color = self.find_values(block, 'diffuseColor', 3) or [1, 1, 1]
+        transparency = (self.find_values(block, 'transparency', 1) or [0])[0]
+        radius = (self.find_values(block, 'radius', 1) or [1])[0]
         color.append(1. - transparency)
 
         return np.array(coords), radius, np.array(color)
@@ -530,7 +744,8 @@ class VRMLParser(Parser):
         in a 3D scene description. It extracts the vertex coordinates, the face
         indices that define the geometry of the solid, and the color of the solid.
         The function also handles transparency by adjusting the alpha value in the
-        color array.
+        color array. The vertex and index lists are each parsed with a single call
+        to NumPy rather than line by line.
 
         :param block: The solid block content as a string.
         :type block: str
@@ -543,42 +758,92 @@ class VRMLParser(Parser):
             where the alpha value is adjusted for transparency.
         :rtype: tuple
         """
-        coords = []
-        coord_inds = []
-        color = [1, 1, 1]
-        transparency = 0
+        coords = self.parse_array(block, 'point [', np.float32).reshape(-1, 3)
+        coord_inds = self.parse_array(block, 'coordIndex [', np.int32)
+        color = self.find_values(block, 'diffuseColor', 3) or [1, 1, 1]
+        transparency = (self.find_values(block, 'transparency', 1) or [0])[0]
+        color.append(1. - transparency)
 
-        lines = block.split('\n')
-        reading_points = False
-        reading_indices = False
+        return coords, coord_inds, np.array(color)
 
-        for line in lines:
-            line = line.strip()
-            if line.startswith('point ['):
-                reading_points = True
-                continue
-            elif line.startswith(']'):
-                reading_points = False
-                reading_indices = False
-                continue
-            elif line.startswith('coordIndex ['):
-                reading_indices = True
-                continue
-            elif 'diffuseColor' in line:
-                color = list(map(float, re.findall(r'[-+]?\d*\.?\d+', line)))
-            elif 'transparency' in line:
-                transparency = float(re.findall(r'[-+]?\d*\.?\d+', line)[0])
-            if reading_points:
-                point = line.replace(',', '').split()
-                if len(point) == 3:
-                    coords.append(list(map(float, point)))
-            elif reading_indices:
-                indices = line.replace(',', '').split()
-                coord_inds.extend(list(map(int, indices)))
 
-        color.append(1. - transparency)
+    def parse_array(self, block, keyword, dtype=float):
+        """Parses the bracketed list of numbers following a keyword.
 
-        return np.array(coords), np.array(coord_inds), np.array(color)
+        The text between the keyword and the next closing bracket is converted
+        to an array in a single pass, with commas treated as whitespace.
+
+        :param block: The block content as a string.
+        :type block: str
+        :param keyword: The keyword preceding the list, including the opening
+            bracket (e.g. `'point ['`).
+        :type keyword: str
+        :param dtype: The data type of the returned array.
+        :type dtype: type, optional
+        :return: A flat array of the parsed numbers, which is empty if the
+            keyword is not found.
+        :rtype: numpy.ndarray
+        """
+        start = block.find(keyword)
+        if start == -1:
+            return np.array([], dtype=dtype)
+        start += len(keyword)
+        end = block.find(']', start)
+        # str.replace costs a few percent of the parse itself; str.translate
+        # and np.loadtxt were both measured to be slower
+        text = block[start:end].replace(',', ' ')
+        # np.fromstring returns a spurious value for whitespace-only input
+        if not text or text.isspace():
+            return np.array([], dtype=dtype)
+        return np.fromstring(text, sep=' ', dtype=dtype)
+
+
+    def find_values(self, block, keyword, count):
+        """Finds the numbers following the first occurrence of a keyword.
+
+        Only the remainder of the line containing the keyword is searched,
+        so the rest of the block is never split into lines.
+
+        :param block: The block content as a string.
+        :type block: str
+        :param keyword: The keyword preceding the numbers.
+        :type keyword: str
+        :param count: The number of values expected.
+        :type count: int
+        :return: The first `count` values, or None if the keyword is not found
+            or fewer values are present.
+        :rtype: list
+        """
+        start = block.find(keyword)
+        if start == -1:
+            return None
+        start += len(keyword)
+        end = block.find('\n', start)
+        if end == -1:
+            end = len(block)
+        # the values are normally separated by whitespace alone, so the
+        # regular expression is only needed when that fails
+        try:
+            values = [float(v) for v in block[start:end].split()[:count]]
+            if len(values) == count:
+                return values
+        except ValueError:
+            pass
+        values = _NUM_RE.findall(block, start, end)
+        if len(values) < count:
+            return None
+        return [float(v) for v in values[:count]]
+
+
+def process_vrml_blocks(blocks):
+    """Processes a list of VRML blocks in a worker process.
+
+    :param blocks: List of (block type, block content) tuples.
+    :type blocks: list
+    :return: List of (block type, processed block) tuples.
+    :rtype: list
+    """
+    return VRMLParser(None).process_blocks(blocks)
 
 
 class HepRepParser(Parser):
@@ -834,19 +1099,15 @@ class HepRepParser(Parser):
                                                             return_index=True, return_inverse=True)
                 comp['mesh_points'] = [unique_points]
 
-                inds = []
-                this_ind = 0
-                for point in comp['points']:
-                    ind = [len(point)]
-                    ind.extend(inverse[this_ind:this_ind + len(point)])
-                    this_ind += len(point)
-                    inds.append(ind)
-
-                quad_faces = [face for face in inds if len(face) == 5]
-                tri_faces = [face for face in inds if len(face) == 4]
-                quad_faces = np.unique(np.array(quad_faces), axis=0)
-                tri_faces = np.unique(np.array(tri_faces), axis=0)
-                comp['mesh_inds'] = [np.concatenate([quad_faces.flatten(), tri_faces.flatten()])]
+                # gather the faces of each size as rows of [size, i0, i1, ...]
+                lengths = np.array([len(point) for point in comp['points']])
+                face_starts = np.cumsum(lengths) - lengths
+                faces = []
+                for size in (4, 3):
+                    rows = inverse.ravel()[face_starts[lengths == size][:, None] + np.arange(size)]
+                    rows = np.column_stack([np.full(len(rows), size), rows])
+                    faces.append(np.unique(rows, axis=0).flatten())
+                comp['mesh_inds'] = [np.concatenate(faces)]
                 comp['scalars'] = [comp['colors'] * len(comp['mesh_points'][0])]
 
             elif comp['shape'] == 'Point':
@@ -856,17 +1117,9 @@ class HepRepParser(Parser):
 
             elif comp['shape'] == 'Line':
                 comp['mesh_points'] = [np.concatenate(comp['points'])]
-                point_inds = np.arange(len(comp['mesh_points'][0]))
-                inds = []
-                this_ind = 0
-                for point in comp['points']:
-                    ind = [len(point)]
-                    ind.extend(point_inds[this_ind:this_ind + len(point)])
-                    this_ind += len(point)
-                    inds.append(ind)
-                comp['mesh_inds'] = [np.concatenate(inds)]
-                comp['scalars'] = [np.concatenate([[color]*len(point) for color, point in \
-                                                   zip(comp['colors'], comp['points'])])]
+                lengths = np.array([len(point) for point in comp['points']])
+                comp['mesh_inds'] = [self.build_cell_array(lengths)]
+                comp['scalars'] = [np.repeat(np.array(comp['colors']), lengths, axis=0)]
 
             if len(comp['children']) > 0:
                 self.create_meshes(comp['children'], progress_obj)
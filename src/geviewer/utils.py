@@ -2,6 +2,13 @@ import os
 from pathlib import Path
 
 
+# files that parse faster than this many seconds are not worth caching
+CACHE_MIN_PARSE_TIME = 5.
+
+# the total size in bytes that the cache directory is kept within
+CACHE_SIZE_LIMIT = 2 << 30
+
+
 def check_files(files):
     """Checks if the file paths are valid.
     """
@@ -17,6 +24,74 @@ def check_files(files):
     return True
 
 
+def get_cache_dir():
+    """Gets the directory in which parsed files are cached.
+
+    :return: The path to the cache directory.
+    :rtype: str
+    """
+    cache_home = os.environ.get('XDG_CACHE_HOME', os.path.join(str(Path.home()), '.cache'))
+    return os.path.join(cache_home, 'geviewer')
+
+
+def get_cache_path(filename):
+    """Gets the path of the cached .gev file for a given source file.
+
+    The name of the cached file encodes the modification time and size of the
+    source file along with the GeViewer version, so a cached file is only
+    found if none of these have changed since it was written.
+
+    :param filename: The path to the source file.
+    :type filename: str
+    :return: The path to the cached .gev file.
+    :rtype: str
+    """
+    import hashlib
+    import geviewer
+    filename = str(Path(filename).resolve())
+    stat = os.stat(filename)
+    prefix = hashlib.sha1(filename.encode()).hexdigest()[:16]
+    key = '{}_{}_{}'.format(stat.st_mtime_ns, stat.st_size, geviewer.__version__)
+    return os.path.join(get_cache_dir(), '{}_{}.gev'.format(prefix, key))
+
+
+def clear_stale_cache(cache_path):
+    """Removes outdated cached files for the same source file.
+
+    :param cache_path: The path to the current cached .gev file.
+    :type cache_path: str
+    """
+    cache_dir, name = os.path.split(cache_path)
+    prefix = name.split('_')[0] + '_'
+    for file in os.listdir(cache_dir):
+        if file.startswith(prefix) and file != name:
+            os.remove(os.path.join(cache_dir, file))
+
+
+def trim_cache(size_limit=CACHE_SIZE_LIMIT):
+    """Removes the least recently used cached files until the cache fits
+    within a size limit.
+
+    :param size_limit: The maximum total size of the cached files in bytes.
+    :type size_limit: int, optional
+    """
+    cache_dir = get_cache_dir()
+    if not os.path.isdir(cache_dir):
+        return
+    entries = []
+    for file in os.listdir(cache_dir):
+        if file.endswith('.gev'):
+            path = os.path.join(cache_dir, file)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= size_limit:
+            break
+        os.remove(path)
+        total -= size
+
+
 def check_for_updates():
     """Determines whether the user is using the latest version of GeViewer.
     If not, prints a message to the console to inform the user.
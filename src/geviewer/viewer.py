@@ -1,13 +1,14 @@
 import numpy as np
 import pyvista as pv
 import os
-import shutil
 import zipfile
 import tempfile
 import json
 import gc
-from pyvistaqt import QtInteractor
-from geviewer import parsers
+import uuid
+import time
+import hashlib
+from geviewer import parsers, utils
 
 
 class GeViewer:
@@ -26,10 +27,13 @@ class GeViewer:
         """
         self.off_screen = False
         if plotter_widget:
+            from pyvistaqt import QtInteractor
             self.plotter = QtInteractor(plotter_widget)
         else:
-            self.plotter = pv.Plotter()
-        self.bkg_colors = ['lightskyblue', 'midnightblue']
+            # without a widget the viewer is only used headless, such as
+            # by the converter, so it never needs an on-screen window
+            self.plotter = pv.Plotter(off_screen=True)
+        self.reset_background_colors()
         self.plotter.set_background(*self.bkg_colors)
         self.bkg_on = True
         self.wireframe = False
@@ -38,35 +42,125 @@ class GeViewer:
         self.parallel = False
         self.components = []
         self.overlaps = []
-        self.event_ids = []
+        self.event_ids = set()
         self.actors = {}
+        self.properties = {}
+        self.prepared_meshes = {}
+        self.rng = np.random.default_rng()
 
 
-    def load_file(self, filename, off_screen=False, progress_obj=None):
+    def load_file(self, filename, off_screen=False, progress_obj=None, use_cache=False):
         """Loads the file into the components list.
 
+        If caching is enabled, VRML and HepRep files that are slow to parse are
+        cached as .gev files, so subsequent loads of an unchanged file skip
+        parsing and mesh construction.
+
         :param filename: The name of the file to load.
         :type filename: str
         :param off_screen: If True, the plotter is created without displaying it. Defaults to False.
         :type off_screen: bool, optional
         :param progress_obj: The progress bar object to use.
         :type progress_obj: ProgressBar, optional
+        :param use_cache: If True, reads from and writes to the cache. Defaults to False.
+        :type use_cache: bool, optional
         """
         self.off_screen = off_screen
         if filename.endswith('.gev'):
             new_components = self.load_session(filename)
-        elif filename.endswith('.wrl'):
-            parser = parsers.VRMLParser(filename)
-            parser.parse_file(progress_obj)
-            new_components = [parser.components]
-        elif filename.endswith('heprep'):
-            parser = parsers.HepRepParser(filename)
-            parser.parse_file(progress_obj)
-            new_components = parser.components
+        else:
+            cache_path = utils.get_cache_path(filename) if use_cache else None
+            if cache_path and os.path.exists(cache_path):
+                update = 'Loading cached copy of {}...\n'.format(filename)
+                if progress_obj:
+                    if progress_obj.sync_status(update=update): return
+                else:
+                    print(update)
+                new_components = self.load_session(cache_path)
+                self.assign_new_ids(new_components)
+                try:
+                    # mark the entry as recently used so it is trimmed last
+                    os.utime(cache_path)
+                except OSError:
+                    pass
+            else:
+                start_time = time.time()
+                if filename.endswith('.wrl'):
+                    parser = parsers.VRMLParser(filename)
+                    parser.parse_file(progress_obj)
+                    new_components = [parser.components]
+                elif filename.endswith('heprep'):
+                    parser = parsers.HepRepParser(filename)
+                    parser.parse_file(progress_obj)
+                    new_components = parser.components
+                # the cache only pays off for files that are slow to parse
+                if cache_path and time.time() - start_time >= utils.CACHE_MIN_PARSE_TIME \
+                   and not (progress_obj and progress_obj.sync_status()):
+                    self.write_cache(new_components, cache_path, progress_obj)
         self.num_to_plot = self.count_components(new_components)
         self.components.extend(new_components)
 
 
+    def write_cache(self, components, cache_path, progress_obj=None):
+        """Writes the components to the cache.
+
+        Components whose meshes would take up more than the cache size limit
+        are not cached, and the least recently used entries are removed to keep
+        the cache within the limit. Failing to write the cache is not an error,
+        since the cache only serves to speed up loading.
+
+        :param components: The components to cache.
+        :type components: list
+        :param cache_path: The path to the cached .gev file.
+        :type cache_path: str
+        :param progress_obj: The progress bar object to use.
+        :type progress_obj: ProgressBar, optional
+        """
+        size = 0
+        stack = list(components)
+        while stack:
+            comp = stack.pop()
+            if comp['mesh'] is not None:
+                size += comp['mesh'].actual_memory_size*1024
+            for key in ['mesh_points', 'mesh_inds', 'scalars']:
+                if comp[key] is not None:
+                    size += np.asarray(comp[key]).nbytes
+            stack.extend(comp['children'])
+        if size > utils.CACHE_SIZE_LIMIT:
+            update = 'Skipping cache: {:.0f} MB exceeds the cache size limit.\n'.format(size/1e6)
+        else:
+            update = 'Writing cached copy ({:.0f} MB)...\n'.format(size/1e6)
+        if progress_obj:
+            if progress_obj.sync_status(update=update): return
+        else:
+            print(update)
+        if size > utils.CACHE_SIZE_LIMIT:
+            return
+
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            self.save_session(cache_path, components)
+            utils.clear_stale_cache(cache_path)
+            utils.trim_cache()
+        except:
+            # don't want this to interrupt regular use if there's a problem
+            return
+
+
+    def assign_new_ids(self, components):
+        """Assigns new unique ids to the components so that components loaded
+        from the same cached file more than once do not collide.
+
+        :param components: The components to assign new ids to.
+        :type components: list
+        """
+        stack = list(components)
+        while stack:
+            comp = stack.pop()
+            comp['id'] = str(uuid.uuid4())[-12:]
+            stack.extend(comp['children'])
+
+
     def count_components(self, components, exclude_events=False, exclude_invisible=False):
         """Counts the number of components in the list of components.
 
@@ -78,13 +172,15 @@ class GeViewer:
         if self.off_screen:
             exclude_invisible = False
         count = 0
-        for comp in components:
+        # walk the tree with an explicit stack to avoid deep recursion
+        stack = list(components)
+        while stack:
+            comp = stack.pop()
             if not (exclude_events and ((comp['mesh'] is None) or (comp['shape'] == 'Point') or \
                 (comp['shape'] == 'Line')) or (exclude_invisible and not self.actors[comp['id']].GetVisibility())):
                 count += 1
-            if len(comp['children']) > 0:
-                count += self.count_components(comp['children'], exclude_events=exclude_events, \
-                                               exclude_invisible=exclude_invisible)
+            if comp['children']:
+                stack.extend(comp['children'])
         return count
     
     
@@ -106,27 +202,46 @@ class GeViewer:
             progress_obj.signal_finished()
 
 
-    def plot_meshes(self, components, level=0, progress_obj=None):
+    def plot_meshes(self, components, progress_obj=None):
         """Plots the meshes and saved the actors in a dictionary.
 
+        The component tree is walked depth-first with an explicit stack, and
+        the status messages are sent in batches rather than one at a time.
+
         :param components: The components to plot.
         :type components: list
-        :param level: Keeps track of the recursion level.
-        :type level: int, optional
         :param progress_obj: The progress object to use for the plotter.
         :type progress_obj: ProgressBar, optional
         """
         style = 'wireframe' if self.wireframe else 'surface'
         opacity = 0.3 if self.transparent else 1.
-        for comp in components:
-            if comp['mesh'] is not None and not comp['has_actor']:
-                update = '...'*level + 'Plotting ' + comp['name'] + '...\n'
+        batch_size = 64
+        pending = []
+
+        def send_updates():
+            """Sends the pending status messages.
+
+            :return: Whether the task should be interrupted.
+            :rtype: bool
+            """
+            if pending:
+                update = ''.join(pending)
+                pending.clear()
                 if progress_obj:
-                    if progress_obj.sync_status(update=update): return
+                    if progress_obj.sync_status(update=update): return True
                 else:
                     print(update)
+            return False
+
+        stack = [(comp, 0) for comp in reversed(components)]
+        while stack:
+            comp, level = stack.pop()
+            if comp['mesh'] is not None and not comp['has_actor']:
+                pending.append('...'*level + 'Plotting ' + comp['name'] + '...\n')
+                if len(pending) >= batch_size:
+                    if send_updates(): return
                 if comp['is_event']:
-                    self.event_ids.append(comp['id'])
+                    self.event_ids.add(comp['id'])
                     this_opacity = 1
                 else:
                     this_opacity = opacity
@@ -135,21 +250,32 @@ class GeViewer:
                                               point_size=5*comp['is_dot'], style=style, \
                                               opacity=this_opacity, name=comp['id'])
                 self.actors[comp['id']] = actor
+                self.properties[comp['id']] = actor.GetProperty()
                 comp['has_actor'] = True
                 if progress_obj:
                     if progress_obj.sync_status(increment=True): return
-            if len(comp['children']) > 0:
-                self.plot_meshes(comp['children'], level + 1, progress_obj)
-        if level == 0:
-            self.plotter.view_isometric()
-            update = 'Done plotting.\n'
-            if progress_obj:
-                if progress_obj.sync_status(update=update): return
-            else:
-                print(update)
-            self.num_to_plot = 0
+            stack.extend((child, level + 1) for child in reversed(comp['children']))
+        if send_updates(): return
+
+        self.plotter.view_isometric()
+        update = 'Done plotting.\n'
+        if progress_obj:
+            if progress_obj.sync_status(update=update): return
+        else:
+            print(update)
+        self.num_to_plot = 0
         
 
+    def reset_background_colors(self):
+        """Resets the background colors to the defaults.
+
+        The color names are resolved to RGB values once here, since PyVista
+        parses color names much more slowly than RGB tuples when the
+        background is set.
+        """
+        self.bkg_colors = [pv.Color(color).float_rgb for color in ('lightskyblue', 'midnightblue')]
+
+
     def set_background_color(self):
         """Sets the background color.
         """
@@ -179,7 +305,7 @@ class GeViewer:
             top = self.bkg_colors[1] if self.gradient else None
             self.plotter.set_background(self.bkg_colors[0],top=top)
         else:
-            self.plotter.set_background('white')
+            self.plotter.set_background((1., 1., 1.))
         if not self.off_screen:
             self.plotter.update()
 
@@ -190,11 +316,11 @@ class GeViewer:
         """
         self.wireframe = not self.wireframe
         if self.wireframe:
-            for actor in self.actors.values():
-                actor.GetProperty().SetRepresentationToWireframe()
+            for prop in self.properties.values():
+                prop.SetRepresentationToWireframe()
         else:
-            for actor in self.actors.values():
-                actor.GetProperty().SetRepresentationToSurface()
+            for prop in self.properties.values():
+                prop.SetRepresentationToSurface()
         if not self.off_screen:
             self.plotter.update()
 
@@ -204,117 +330,145 @@ class GeViewer:
         """
         self.transparent = not self.transparent
         if self.transparent:
-            for id, actor in self.actors.items():
+            for id, prop in self.properties.items():
                 if id in self.event_ids:
                     continue
-                actor.GetProperty().SetOpacity(0.3)
+                prop.SetOpacity(0.3)
         else:
-            for actor in self.actors.values():
-                actor.GetProperty().SetOpacity(1)
+            for prop in self.properties.values():
+                prop.SetOpacity(1)
         if not self.off_screen:
             self.plotter.update()
 
 
-    def save_session(self, filename):
+    def save_session(self, filename, components=None):
         """Saves the session to a .gev file.
 
+        The arrays and component metadata are streamed directly into the archive,
+        while each mesh passes through a single short-lived temporary file, since
+        VTK writes files much faster than it writes to memory. The archive is
+        written next to the destination and then moved into place, so an
+        interrupted save never leaves a partial file behind.
+
         :param filename: The name of the file to save the session to.
         :type filename: str
+        :param components: The components to save. Defaults to all loaded components.
+        :type components: list, optional
         """
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmpfolder = tmpdir + '/gevfile/'
-            os.makedirs(tmpfolder, exist_ok=False)
-            def save_serializable_entries(components, level=0, saveable_dicts=[]):
-                for comp in components:
+        if components is None:
+            components = self.components
+
+        # if using the default filename and it exists, increment
+        # the number until a unique filename is found
+        if filename=='viewer.gev' and os.path.exists(filename):
+            filename = 'viewer2.gev'
+            i = 2
+            while(os.path.exists('viewer{}.gev'.format(i))):
+                i += 1
+            filename = 'viewer{}.gev'.format(i)
+
+        tmp_filename = '{}.{}.tmp'.format(filename, os.getpid())
+        try:
+            # the binary arrays and meshes barely compress, so only the
+            # metadata is deflated
+            with zipfile.ZipFile(tmp_filename, 'w', compression=zipfile.ZIP_STORED) as archive, \
+                 tempfile.TemporaryDirectory() as tmpdir:
+                array_names = {}
+                saveable_dicts = []
+                # walk the tree with an explicit stack to avoid deep recursion,
+                # appending each entry to the list of children of its parent
+                stack = [(comp, saveable_dicts) for comp in reversed(components)]
+                while stack:
+                    comp, siblings = stack.pop()
                     temp_dict = {}
                     for key, value in comp.items():
                         if key not in ['mesh_points', 'mesh_inds', 'scalars', 'mesh', 'actor']:
                             temp_dict[key] = value
-                    if comp['mesh_points'] is not None:
-                        np.save(tmpfolder + 'mesh_points_{}.npy'.format(comp['id']), comp['mesh_points'], allow_pickle=False)
-                        temp_dict['mesh_points'] = 'mesh_points_{}.npy'.format(comp['id'])
-                    else:
-                        temp_dict['mesh_points'] = None
-                    if comp['mesh_inds'] is not None:
-                        np.save(tmpfolder + 'mesh_inds_{}.npy'.format(comp['id']), comp['mesh_inds'], allow_pickle=False)
-                        temp_dict['mesh_inds'] = 'mesh_inds_{}.npy'.format(comp['id'])
-                    else:
-                        temp_dict['mesh_inds'] = None
-                    if comp['scalars'] is not None:
-                        np.save(tmpfolder + 'scalars_{}.npy'.format(comp['id']), comp['scalars'], allow_pickle=False)
-                        temp_dict['scalars'] = 'scalars_{}.npy'.format(comp['id'])
-                    else:
-                        temp_dict['scalars'] = None
+                    # each array is written to its own .npy entry, with identical
+                    # arrays (such as the index arrays of repeated shapes) stored
+                    # once and shared between components
+                    for key in ['mesh_points', 'mesh_inds', 'scalars']:
+                        if comp[key] is not None:
+                            array = np.ascontiguousarray(comp[key])
+                            digest = (array.dtype.str, array.shape, \
+                                      hashlib.blake2b(array.data, digest_size=16).digest())
+                            if digest not in array_names:
+                                name = '{}_{}.npy'.format(key, comp['id'])
+                                with archive.open(name, 'w', force_zip64=True) as f:
+                                    np.lib.format.write_array(f, array, allow_pickle=False)
+                                array_names[digest] = name
+                            temp_dict[key] = array_names[digest]
+                        else:
+                            temp_dict[key] = None
                     if comp['mesh'] is not None:
-                        comp['mesh'].save(tmpfolder + 'mesh_{}.vtk'.format(comp['id']))
                         temp_dict['mesh'] = 'mesh_{}.vtk'.format(comp['id'])
+                        mesh_path = os.path.join(tmpdir, temp_dict['mesh'])
+                        comp['mesh'].save(mesh_path)
+                        archive.write(mesh_path, arcname=temp_dict['mesh'])
+                        os.remove(mesh_path)
                     else:
                         temp_dict['mesh'] = None
                     temp_dict['has_actor'] = False
-                    if len(comp['children']) > 0:
-                        temp_dict['children'] = []
-                        save_serializable_entries(comp['children'], level + 1, temp_dict['children'])
-                    saveable_dicts.append(temp_dict)
-                if level == 0:
-                    return saveable_dicts
-                
-            saveable_dicts = save_serializable_entries(self.components)
-
-            for i, saveable_dict in enumerate(saveable_dicts):
-                with open(tmpfolder + 'components_dict_{}.json'.format(i), 'w') as f:
-                    json.dump(saveable_dict, f)
-
-            with zipfile.ZipFile(tmpdir + '/gevfile.gev', 'w') as archive:
-                for file_name in os.listdir(tmpfolder):
-                    file_path = os.path.join(tmpfolder, file_name)
-                    archive.write(file_path, arcname=file_name)
-
-            # if using the default filename and it exists, increment
-            # the number until a unique filename is found
-            if filename=='viewer.gev' and os.path.exists(filename):
-                filename = 'viewer2.gev'
-                i = 2
-                while(os.path.exists('viewer{}.gev'.format(i))):
-                    i += 1
-                filename = 'viewer{}.gev'.format(i)
-            shutil.copy(tmpdir + '/gevfile.gev', filename)
+                    temp_dict['children'] = []
+                    siblings.append(temp_dict)
+                    stack.extend((child, temp_dict['children']) for child in reversed(comp['children']))
+
+                for i, saveable_dict in enumerate(saveable_dicts):
+                    archive.writestr('components_dict_{}.json'.format(i), json.dumps(saveable_dict), \
+                                     compress_type=zipfile.ZIP_DEFLATED, compresslevel=1)
+
+            os.replace(tmp_filename, filename)
+        finally:
+            if os.path.exists(tmp_filename):
+                os.remove(tmp_filename)
 
                 
     def load_session(self, filename):
         """Loads the session from a .gev file.
 
+        The arrays and component metadata are read directly from the archive,
+        while each mesh is extracted to a single short-lived temporary file,
+        since VTK reads files much faster than it reads from memory.
+
         :param filename: The name of the file to load the session from.
         :type filename: str
         """
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmpfolder = tmpdir + '/gevfile/'
-            os.makedirs(tmpfolder, exist_ok=False)
-            with zipfile.ZipFile(filename, 'r') as archive:
-                archive.extractall(tmpfolder)
-            files = [f for f in os.listdir(tmpfolder) if f.endswith('.json')]
+        with zipfile.ZipFile(filename, 'r') as archive, tempfile.TemporaryDirectory() as tmpdir:
+            names = archive.namelist()
             components = []
-            for file in files:
-                with open(tmpfolder + file, 'r') as f:
-                    comp = json.load(f)
-                    components.append(comp)
-
-            def load_components(components, level=0):
-                for comp in components:
-                    if comp['mesh_points'] is not None:
-                        comp['mesh_points'] = np.load(tmpfolder + comp['mesh_points'], allow_pickle=False)
-                    if comp['mesh_inds'] is not None:
-                        comp['mesh_inds'] = np.load(tmpfolder + comp['mesh_inds'], allow_pickle=False)
-                    if comp['scalars'] is not None:
-                        comp['scalars'] = np.load(tmpfolder + comp['scalars'], allow_pickle=False)
-                    if comp['mesh'] is not None:
-                        comp['mesh'] = pv.read(tmpfolder + comp['mesh'])
-                    if len(comp['children']) > 0:
-                        load_components(comp['children'], level + 1)
-            
-            load_components(components)
+            for name in names:
+                if name.endswith('.json'):
+                    components.append(json.loads(archive.read(name)))
+
+            # some sessions store the arrays together in a nested .npz file, which
+            # is extracted first since seeking within an archive entry is slow
+            arrays = {}
+            if 'arrays.npz' in names:
+                arrays = np.load(archive.extract('arrays.npz', tmpdir), allow_pickle=False)
+
+            # walk the tree with an explicit stack to avoid deep recursion
+            stack = list(components)
+            while stack:
+                comp = stack.pop()
+                for key in ['mesh_points', 'mesh_inds', 'scalars']:
+                    if comp[key] is None:
+                        continue
+                    if comp[key].endswith('.npy'):
+                        with archive.open(comp[key]) as f:
+                            comp[key] = np.load(f, allow_pickle=False)
+                    else:
+                        comp[key] = arrays[comp[key]]
+                if comp['mesh'] is not None:
+                    mesh_path = archive.extract(comp['mesh'], tmpdir)
+                    comp['mesh'] = pv.read(mesh_path)
+                    os.remove(mesh_path)
+                stack.extend(comp['children'])
+
+            if 'arrays.npz' in names:
+                arrays.close()
             return components
-        
-        
+
+
     def is_mesh_inside(self, mesh1, mesh2):
         """Checks if one mesh is inside another.
 
@@ -353,6 +507,51 @@ class GeViewer:
         return x_overlap and y_overlap and z_overlap
     
     
+    def sample_bounds(self, bounds, n_samples):
+        """Draws stratified random samples from within a bounding box.
+
+        The box is divided into the largest regular grid with at most `n_samples`
+        cells and one point is drawn uniformly from each cell, which covers the box
+        more evenly than independent uniform samples and lowers the variance of the
+        overlap estimate for the same number of points. The remaining points are
+        drawn uniformly from the whole box, so that exactly `n_samples` are returned.
+
+        :param bounds: The bounds of the box as (xmin, xmax, ymin, ymax, zmin, zmax).
+        :type bounds: tuple
+        :param n_samples: The number of samples to draw.
+        :type n_samples: int
+        :return: An array of shape (n_samples, 3) containing the sample points.
+        :rtype: numpy.ndarray
+        """
+        low = np.array(bounds[::2], dtype=float)
+        high = np.array(bounds[1::2], dtype=float)
+        n_samples = int(n_samples)
+        n_per_axis = int(round(n_samples**(1/3)))
+        if n_per_axis**3 > n_samples:
+            n_per_axis -= 1
+        cell_size = (high - low)/max(n_per_axis, 1)
+        inds = np.indices((n_per_axis,)*3).reshape(3, -1).T
+        jitter = self.rng.random(inds.shape)
+        extra = self.rng.random((n_samples - len(inds), 3))
+        return np.concatenate([low + (inds + jitter)*cell_size, low + extra*(high - low)])
+
+
+    def make_point_cloud(self, points):
+        """Wraps an array of points in a dataset for use with VTK filters.
+
+        Only the points are set, since the filters used for the overlap checks
+        do not need vertex cells, which makes this cheaper than `pv.PolyData(points)`.
+
+        :param points: An array of shape (N, 3) containing the point coordinates.
+        :type points: numpy.ndarray
+        :return: The point cloud.
+        :rtype: pyvista.PolyData
+        """
+        cloud = pv.PolyData()
+        cloud.points = points
+        return cloud
+
+
     def get_overlap(self, mesh1, mesh2, tolerance=0.001, n_samples=100000, progress_obj=None):
         """Gets the overlap between two meshes.
 
@@ -390,49 +589,55 @@ class GeViewer:
                 region_mesh = connected_components_2.threshold([i, i], scalars="RegionId")
                 separated_meshes_2.append(region_mesh)
 
-        total_checks = len(separated_meshes_1)*len(separated_meshes_2)
+        # extract the surfaces once and find the pairs of regions whose bounds overlap
+        separated_meshes_1 = [mesh.extract_surface() for mesh in separated_meshes_1]
+        separated_meshes_2 = [mesh.extract_surface() for mesh in separated_meshes_2]
+        bounds_1 = np.array([mesh.bounds for mesh in separated_meshes_1], dtype=float)
+        bounds_2 = np.array([mesh.bounds for mesh in separated_meshes_2], dtype=float)
+        overlap = np.ones((len(bounds_1), len(bounds_2)), dtype=bool)
+        for axis in range(3):
+            overlap &= (bounds_1[:, None, 2*axis] <= bounds_2[None, :, 2*axis + 1]) & \
+                       (bounds_2[None, :, 2*axis] <= bounds_1[:, None, 2*axis + 1])
+        pairs = np.argwhere(overlap)
 
-        # check for overlaps between all regions in mesh 1 and all regions in mesh 2
+        total_checks = len(pairs)
+
+        # check for overlaps between the overlapping regions in mesh 1 and mesh 2
         points = []
         n_surviving = 0
-        current_check = 0
-        for mesh1 in separated_meshes_1:
-            for mesh2 in separated_meshes_2:
-
-                if total_checks > 200 and current_check % 100 == 0:
-                    update = 'Starting check {}/{}...{}'.format(current_check + 1, total_checks, \
-                                                                ['','\n'][total_checks - current_check < 100])
-                    if progress_obj:
-                        if progress_obj.sync_status(update=update): return
-                    else:
-                        print(update)
-
-                mesh1 = mesh1.extract_surface()
-                mesh2 = mesh2.extract_surface()
-
-                if not self.do_bounds_overlap(mesh1, mesh2):
-                    continue
+        enclosed_1 = {}
+        for current_check, (i, j) in enumerate(pairs.tolist()):
+            mesh1 = separated_meshes_1[i]
+            mesh2 = separated_meshes_2[j]
+
+            if total_checks > 200 and current_check % 100 == 0:
+                update = 'Starting check {}/{}...{}'.format(current_check + 1, total_checks, \
+                                                            ['','\n'][total_checks - current_check < 100])
+                if progress_obj:
+                    if progress_obj.sync_status(update=update): return
+                else:
+                    print(update)
 
-                mc_points = np.random.uniform(low=mesh1.bounds[::2], \
-                                              high=mesh1.bounds[1::2], \
-                                              size=(n_samples, 3))
-                
-                mc_points = pv.PolyData(mc_points)
-                select = mc_points.select_enclosed_points(mesh1, tolerance=1e-6)
-                mc_points = select.points[select['SelectedPoints'].astype(bool)]
-                n_surviving += mc_points.shape[0]
-                mc_points = pv.PolyData(mc_points)
-
-                select = mc_points.select_enclosed_points(mesh2, tolerance=1e-6)
-                mc_points = select.points[select['SelectedPoints'].astype(bool)]
-                mc_points = pv.PolyData(mc_points)
-                select = mc_points.compute_implicit_distance(mesh2)
-                bounds = mesh2.bounds
-                dimensions = np.array([bounds[1] - bounds[0], bounds[3] - bounds[2], bounds[5] - bounds[4]])
-                mc_points = select.points[np.abs(select['implicit_distance']) > tolerance*np.linalg.norm(dimensions)]
-                points.append(mc_points)
-
-                current_check += 1
+            # the samples inside a region of mesh 1 do not depend on the region of
+            # mesh 2 it is compared with, so they are found once per region.
+            # find_overlaps only passes meshes without open edges, so the
+            # surface check can be skipped
+            if i not in enclosed_1:
+                mc_points = self.sample_bounds(mesh1.bounds, n_samples)
+                cloud = self.make_point_cloud(mc_points)
+                select = cloud.select_enclosed_points(mesh1, tolerance=1e-6, check_surface=False)
+                enclosed_1[i] = mc_points[select['SelectedPoints'].view(bool)]
+            mc_points = enclosed_1[i]
+            n_surviving += mc_points.shape[0]
+
+            cloud = self.make_point_cloud(mc_points)
+            select = cloud.select_enclosed_points(mesh2, tolerance=1e-6, check_surface=False)
+            mc_points = mc_points[select['SelectedPoints'].view(bool)]
+            select = self.make_point_cloud(mc_points).compute_implicit_distance(mesh2)
+            bounds = mesh2.bounds
+            dimensions = np.array([bounds[1] - bounds[0], bounds[3] - bounds[2], bounds[5] - bounds[4]])
+            mc_points = mc_points[np.abs(select['implicit_distance']) > tolerance*np.linalg.norm(dimensions)]
+            points.append(mc_points)
 
         if len(points) > 0:
             points = pv.PolyData(np.concatenate(points))
@@ -444,124 +649,182 @@ class GeViewer:
         return points, overlap_fraction
         
         
+    def prepare_mesh(self, comp):
+        """Gets a triangulated copy of a component's mesh and its number of open
+        edges for the overlap checks.
+
+        The results are cached by component id, since the meshes are not modified
+        after loading, so they are computed at most once per component even over
+        repeated overlap searches.
+
+        :param comp: The component.
+        :type comp: dict
+        :return: The triangulated mesh and its number of open edges.
+        :rtype: tuple
+        """
+        if comp['id'] not in self.prepared_meshes:
+            mesh = comp['mesh']
+            if not mesh.is_all_triangles:
+                mesh = mesh.triangulate()
+            self.prepared_meshes[comp['id']] = (mesh, mesh.n_open_edges)
+        return self.prepared_meshes[comp['id']]
+
+
+    def find_candidate_pairs(self, bounds, max_pairs=1 << 20):
+        """Finds the pairs of bounding boxes that may contain an overlap.
+
+        The boxes are sorted along the axis on which the fewest of them overlap
+        and swept to find the pairs that overlap on that axis, which are then
+        filtered on the other two axes. Pairs in which one box contains the
+        other are excluded. The sweep is done in batches of sorted boxes so that
+        no more than about `max_pairs` pairs are held in memory at once, and all
+        of this is done with NumPy rather than by comparing every pair in Python.
+
+        :param bounds: An array of shape (N, 6) containing the bounds of each box
+            as (xmin, xmax, ymin, ymax, zmin, zmax).
+        :type bounds: numpy.ndarray
+        :param max_pairs: The approximate number of pairs to check in each batch.
+        :type max_pairs: int, optional
+        :return: Two arrays containing the indices of the first and second box in
+            each candidate pair, with the first index always smaller than the second
+            and the pairs sorted in order of the first and then the second index.
+        :rtype: tuple
+        """
+        bounds = np.asarray(bounds, dtype=float).reshape(-1, 6)
+        indices = np.arange(len(bounds))
+
+        # each box can only overlap the boxes that start before it ends
+        best = None
+        for axis in range(3):
+            order = np.argsort(bounds[:, 2*axis], kind='stable')
+            stops = np.searchsorted(bounds[order, 2*axis], bounds[order, 2*axis + 1], side='right')
+            counts = np.maximum(stops - indices - 1, 0)
+            if best is None or counts.sum() < best[1].sum():
+                best = (order, counts)
+        order, counts = best
+
+        # split the sorted boxes into batches of roughly max_pairs pairs each
+        ends = np.cumsum(counts)
+        firsts, seconds = [], []
+        start = 0
+        while start < len(order):
+            done = ends[start] - counts[start]
+            stop = max(np.searchsorted(ends, done + max_pairs, side='right'), start + 1)
+            batch_counts = counts[start:stop]
+            first = np.repeat(indices[start:stop], batch_counts)
+            offsets = np.arange(len(first)) - np.repeat(np.cumsum(batch_counts) - batch_counts, batch_counts)
+            second = first + 1 + offsets
+            first, second = order[first], order[second]
+
+            b1, b2 = bounds[first], bounds[second]
+            overlap = (b1[:, 0] <= b2[:, 1]) & (b2[:, 0] <= b1[:, 1]) & \
+                      (b1[:, 2] <= b2[:, 3]) & (b2[:, 2] <= b1[:, 3]) & \
+                      (b1[:, 4] <= b2[:, 5]) & (b2[:, 4] <= b1[:, 5])
+            inside_1 = np.all(b1[:, ::2] >= b2[:, ::2], axis=1) & np.all(b1[:, 1::2] <= b2[:, 1::2], axis=1)
+            inside_2 = np.all(b2[:, ::2] >= b1[:, ::2], axis=1) & np.all(b2[:, 1::2] <= b1[:, 1::2], axis=1)
+            keep = overlap & ~inside_1 & ~inside_2
+            firsts.append(first[keep])
+            seconds.append(second[keep])
+            start = stop
+
+        first = np.concatenate(firsts) if firsts else np.zeros(0, dtype=int)
+        second = np.concatenate(seconds) if seconds else np.zeros(0, dtype=int)
+        first, second = np.minimum(first, second), np.maximum(first, second)
+        sort = np.lexsort((second, first))
+
+        return first[sort], second[sort]
+
+
     def find_overlaps(self, tolerance=0.001, n_samples=100000, progress_obj=None):
         """Finds the overlaps between the meshes.
 
+        The bounding boxes of all visible meshes are compared at once to find
+        the pairs that could overlap, and only those pairs are checked in detail.
+
         :param tolerance: The tolerance for the overlap.
         :type tolerance: float, optional
         :param n_samples: The number of samples to use.
         :type n_samples: int, optional
-        :return: The ids of the meshes that overlap.
+        :return: The ids of the meshes that overlap, listed in pairs, so that a mesh
+            overlapping several others appears once for each overlap.
         :rtype: list
         """
         for actor in self.overlaps:
             self.plotter.remove_actor(actor)
         self.overlaps.clear()
         overlapping_meshes = []
-        checked = []
+        excluded = set()
 
-        def find_overlaps_recursive(components, level=0, progress_obj=None):
-            """Finds the overlaps between the meshes.
+        # collect the visible geometry meshes in depth-first order
+        flat = []
+        stack = list(reversed(self.components))
+        while stack:
+            comp = stack.pop()
+            if comp['mesh'] is not None and not comp['is_event'] and \
+                (self.off_screen or self.actors[comp['id']].GetVisibility()):
+                flat.append(comp)
+            stack.extend(reversed(comp['children']))
 
-            :param components: The components to check for overlaps.
-            :type components: list
-            :param level: Keeps track of the recursion level.
-            :type level: int, optional
-            :param progress_obj: The progress bar object to use.
-            :type progress_obj: ProgressBar, optional
-            """
-            for comp in components:
-                if comp['mesh'] is not None and not comp['is_event']:
-                    check_for_overlaps(comp, self.components, progress_obj)
-                if len(comp['children']) > 0:
-                    find_overlaps_recursive(comp['children'], level + 1, progress_obj)
-                checked.append(comp['id'])
-
-        def check_for_overlaps(comp1, components, progress_obj=None):
-            """Checks for overlaps between one component and all other components.
-
-            :param comp1: The first component.
-            :type comp1: dict
-            :param components: The components to check for overlaps.
-            :type components: list
-            :param progress_obj: The progress bar object to use.
-            :type progress_obj: ProgressBar, optional
-            """
-            for comp2 in components:
-
-                if comp2['mesh'] is not None and not comp2['is_event'] \
-                    and (comp1['id'] != comp2['id']) and (comp1['id'] not in checked) and (comp2['id'] not in checked):
-
-                    mesh1 = comp1['mesh']
-                    mesh2 = comp2['mesh']
-
-                    skip = False
-                    if not self.off_screen and not (self.actors[comp1['id']].GetVisibility() and \
-                                                    self.actors[comp2['id']].GetVisibility()):
-                        skip = True
-                    if not skip:
-                        update = 'Checking {} and {}...\n'.format(comp1['name'], comp2['name'])
-                        if progress_obj:
-                            if progress_obj.sync_status(update=update, increment=True): return
-                        else:
-                            print(update)
-                    if not skip and not mesh1.is_all_triangles:
-                        mesh1 = mesh1.triangulate()
-                    if not skip and not mesh2.is_all_triangles:
-                        mesh2 = mesh2.triangulate()
-                    if not skip and (self.is_mesh_inside(mesh1, mesh2) or self.is_mesh_inside(mesh2, mesh1)):
-                        skip = True
-                    if not skip and not self.do_bounds_overlap(mesh1, mesh2):
-                        skip = True
-                    if not skip and (mesh1.n_open_edges + mesh2.n_open_edges > 0):
-                        skip = True
-                        if mesh1.n_open_edges > 0:
-                            update = 'Warning: unable to check {} for overlaps\n'.format(comp1['name'])
-                            update += '-> {} has {} open edges.\n'.format(comp1['name'], mesh1.n_open_edges)
-                            checked.append(comp1['id'])
-                        else:
-                            update = 'Warning: unable to check {} for overlaps\n'.format(comp2['name'])
-                            update += '-> {} has {} open edges.\n'.format(comp2['name'], mesh2.n_open_edges)
-                            checked.append(comp2['id'])
-                        if progress_obj:
-                            if progress_obj.sync_status(update=update): return
-                        else:
-                            print(update)
-
-                    if not skip:
-                        points, overlap_fraction = self.get_overlap(mesh1, mesh2, tolerance, n_samples, progress_obj)
-                        threshold = n_samples * tolerance
-
-                        if overlap_fraction is None:
-                            update = 'Warning: insufficient sample points to check for overlap between {} and {}\n'\
-                                     .format(comp1['name'], comp2['name'])
-                            if progress_obj:
-                                if progress_obj.sync_status(update=update): return
-                            else:
-                                print(update)
-                        elif points.n_points > threshold:
-                            overlapping_meshes.append(comp1['id'])
-                            overlapping_meshes.append(comp2['id'])
-                            actor = self.plotter.add_mesh(points, color='red', style='points', show_edges=False)
-                            self.overlaps.append(actor)
-                            update = 'Warning: {} may overlap {} by {:.3f} percent\n'\
-                                    .format(comp1['name'], comp2['name'], 100.*overlap_fraction)
-                            if progress_obj:
-                                if progress_obj.sync_status(update=update): return
-                            else:
-                                print(update)
-
-                if len(comp2['children']) > 0:
-                    check_for_overlaps(comp1, comp2['children'], progress_obj)
+        bounds = np.array([comp['mesh'].bounds for comp in flat], dtype=float)
+        first, second = self.find_candidate_pairs(bounds)
 
         if progress_obj:
             progress_obj.reset_progress()
-            num_components = self.count_components(self.components, exclude_events=True, \
-                                                   exclude_invisible=True)
-            num_checks = int(num_components*(num_components - 1)/2)
-            progress_obj.set_maximum_value(num_checks)
+            progress_obj.set_maximum_value(len(first))
 
-        find_overlaps_recursive(self.components, progress_obj=progress_obj)
+        for i, j in zip(first.tolist(), second.tolist()):
+            comp1 = flat[i]
+            comp2 = flat[j]
+
+            if progress_obj:
+                if progress_obj.sync_status(increment=True): return
+            if comp1['id'] in excluded or comp2['id'] in excluded:
+                continue
+
+            update = 'Checking {} and {}...\n'.format(comp1['name'], comp2['name'])
+            if progress_obj:
+                if progress_obj.sync_status(update=update): return
+            else:
+                print(update)
+
+            mesh1, open_edges_1 = self.prepare_mesh(comp1)
+            mesh2, open_edges_2 = self.prepare_mesh(comp2)
+            if open_edges_1 + open_edges_2 > 0:
+                if open_edges_1 > 0:
+                    update = 'Warning: unable to check {} for overlaps\n'.format(comp1['name'])
+                    update += '-> {} has {} open edges.\n'.format(comp1['name'], open_edges_1)
+                    excluded.add(comp1['id'])
+                else:
+                    update = 'Warning: unable to check {} for overlaps\n'.format(comp2['name'])
+                    update += '-> {} has {} open edges.\n'.format(comp2['name'], open_edges_2)
+                    excluded.add(comp2['id'])
+                if progress_obj:
+                    if progress_obj.sync_status(update=update): return
+                else:
+                    print(update)
+                continue
+
+            points, overlap_fraction = self.get_overlap(mesh1, mesh2, tolerance, n_samples, progress_obj)
+            threshold = n_samples * tolerance
+
+            if overlap_fraction is None:
+                update = 'Warning: insufficient sample points to check for overlap between {} and {}\n'\
+                         .format(comp1['name'], comp2['name'])
+                if progress_obj:
+                    if progress_obj.sync_status(update=update): return
+                else:
+                    print(update)
+            elif points.n_points > threshold:
+                overlapping_meshes.append(comp1['id'])
+                overlapping_meshes.append(comp2['id'])
+                actor = self.plotter.add_mesh(points, color='red', style='points', show_edges=False)
+                self.overlaps.append(actor)
+                update = 'Warning: {} may overlap {} by {:.3f} percent\n'\
+                        .format(comp1['name'], comp2['name'], 100.*overlap_fraction)
+                if progress_obj:
+                    if progress_obj.sync_status(update=update): return
+                else:
+                    print(update)
 
         if progress_obj:
             progress_obj.signal_finished()
@@ -575,16 +838,13 @@ class GeViewer:
         :param components: The components to clear the meshes from.
         :type components: list
         """
-        for comp in components:
+        stack = list(components)
+        while stack:
+            comp = stack.pop()
             children = comp.pop('children', [])
             comp.clear()
             comp['children'] = children
-
-            if 'mesh' in comp:
-                comp['mesh'] = None
-
-            if children:
-                self.clear_component_meshes(children)
+            stack.extend(children)
     
     
     def clear_meshes(self):
@@ -594,6 +854,8 @@ class GeViewer:
             self.plotter.remove_actor(actor)
         
         self.actors.clear()
+        self.properties.clear()
+        self.prepared_meshes.clear()
         self.clear_component_meshes(self.components)
         self.components.clear()
         self.overlaps.clear()
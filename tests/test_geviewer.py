@@ -2,12 +2,20 @@ import unittest
 from unittest import mock
 import os
 import tempfile
-from geviewer import viewer, utils
+import numpy as np
+import pyvista as pv
+from geviewer import viewer, utils, parsers
 
 class TestGeViewer(unittest.TestCase):
 
     def setUp(self):
         """Sets up the GeViewer object."""
+        # keep the cache out of the user's home directory
+        cache_home = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_home.cleanup)
+        patcher = mock.patch.dict(os.environ, {'XDG_CACHE_HOME': cache_home.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
         self.gev = viewer.GeViewer()
 
     def test_load_vrml_file(self):
@@ -39,6 +47,126 @@ class TestGeViewer(unittest.TestCase):
         self.gev.clear_meshes()
         self.assertEqual(len(self.gev.plotter.actors), 0)
 
+    @mock.patch('geviewer.utils.CACHE_MIN_PARSE_TIME', 0)
+    def test_cache_miss_writes_entry(self):
+        """Tests that parsing a file writes it to the cache."""
+        cache_path = utils.get_cache_path('tests/sample.wrl')
+        self.assertFalse(os.path.exists(cache_path))
+        self.gev.load_file('tests/sample.wrl', off_screen=True, use_cache=True)
+        self.assertTrue(os.path.exists(cache_path))
+
+    @mock.patch('geviewer.utils.CACHE_MIN_PARSE_TIME', 0)
+    def test_cache_hit_skips_parsing(self):
+        """Tests that a cached file is loaded without parsing and with new ids."""
+        self.gev.load_file('tests/sample.heprep', off_screen=True, use_cache=True)
+        first_ids = {comp['id'] for comp in self.gev.components}
+        with mock.patch.object(parsers.HepRepParser, 'parse_file') as parse_file:
+            self.gev.load_file('tests/sample.heprep', off_screen=True, use_cache=True)
+            parse_file.assert_not_called()
+        self.assertEqual(len(self.gev.components), 2*len(first_ids))
+        second_ids = {comp['id'] for comp in self.gev.components[len(first_ids):]}
+        self.assertFalse(first_ids & second_ids)
+
+    @mock.patch('geviewer.utils.CACHE_MIN_PARSE_TIME', 0)
+    def test_cache_cleared_when_stale(self):
+        """Tests that the old cache entry is removed after the source changes."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, 'sample.wrl')
+            with open('tests/sample.wrl', 'rb') as src, open(filename, 'wb') as dst:
+                dst.write(src.read())
+            self.gev.load_file(filename, off_screen=True, use_cache=True)
+            old_path = utils.get_cache_path(filename)
+            stat = os.stat(filename)
+            os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+            self.gev.load_file(filename, off_screen=True, use_cache=True)
+            self.assertFalse(os.path.exists(old_path))
+            self.assertTrue(os.path.exists(utils.get_cache_path(filename)))
+
+    def test_cache_skips_fast_files(self):
+        """Tests that files that parse quickly are not cached."""
+        self.gev.load_file('tests/sample.wrl', off_screen=True, use_cache=True)
+        self.assertFalse(os.path.exists(utils.get_cache_path('tests/sample.wrl')))
+
+    def test_trim_cache(self):
+        """Tests that the least recently used cached files are removed first."""
+        cache_dir = utils.get_cache_dir()
+        os.makedirs(cache_dir)
+        for i, name in enumerate(['old.gev', 'new.gev']):
+            with open(os.path.join(cache_dir, name), 'wb') as f:
+                f.write(bytes(100))
+            os.utime(os.path.join(cache_dir, name), (i, i))
+        utils.trim_cache(size_limit=150)
+        self.assertEqual(os.listdir(cache_dir), ['new.gev'])
+
+    def parse_vrml(self, **kwargs):
+        """Parses the sample VRML file and returns the points and colors of each mesh."""
+        parser = parsers.VRMLParser('tests/sample.wrl')
+        parser.parse_file(**kwargs)
+        return [(comp['mesh'].points, comp['mesh'].point_data['color']) \
+                for comp in parser.components['children']]
+
+    def assertSameMeshes(self, meshes, expected):
+        """Asserts that two lists of mesh points and colors are equal."""
+        self.assertEqual(len(meshes), len(expected))
+        for (points, colors), (exp_points, exp_colors) in zip(meshes, expected):
+            np.testing.assert_array_equal(points, exp_points)
+            np.testing.assert_array_equal(colors, exp_colors)
+
+    @mock.patch('os.cpu_count', return_value=2)
+    @mock.patch.object(parsers.VRMLParser, 'parallel_min_size', 0)
+    @mock.patch.object(parsers.VRMLParser, 'chunk_size', 2)
+    def test_parse_vrml_parallel(self, cpu_count):
+        """Tests that parsing in worker processes gives the same meshes."""
+        expected = self.parse_vrml(parallel=False)
+        self.assertSameMeshes(self.parse_vrml(), expected)
+
+    @mock.patch('os.cpu_count', return_value=2)
+    @mock.patch.object(parsers.VRMLParser, 'parallel_min_size', 0)
+    @mock.patch.object(parsers.VRMLParser, 'chunk_size', 2)
+    def test_parse_vrml_parallel_fallback(self, cpu_count):
+        """Tests that the blocks are processed in-process if the workers fail."""
+        expected = self.parse_vrml(parallel=False)
+        with mock.patch.object(parsers, 'ProcessPoolExecutor') as executor:
+            executor.return_value.submit.return_value.result.side_effect = \
+                parsers.BrokenProcessPool()
+            meshes = self.parse_vrml()
+            executor.return_value.submit.assert_called()
+        self.assertSameMeshes(meshes, expected)
+        with mock.patch.object(parsers, 'ProcessPoolExecutor', side_effect=RuntimeError()):
+            self.assertSameMeshes(self.parse_vrml(), expected)
+
+    def test_process_solid_block(self):
+        """Tests that only triangles and quads terminated by -1 are kept as faces."""
+        parser = parsers.VRMLParser(None)
+        block = 'coord Coordinate { point [ 0 0 0, 1 0 0, 1 1 0, 0 1 0, 0 0 1, ] } ' \
+                'coordIndex [ 0, 1, 2, -1, 0, 1, 2, 3, -1, -1, 0, 1, 2, 3, 4, -1, ' \
+                '1, 2, 3, -1, 2, 3, 4 ]'
+        points, faces, lengths, color = parser.process_solid_block(block)
+        self.assertEqual(points.shape, (5, 3))
+        self.assertEqual(faces.tolist(), [3, 0, 1, 2, 4, 0, 1, 2, 3, 3, 1, 2, 3])
+        self.assertEqual(lengths.tolist(), [3, 4, 3])
+
+    def test_process_polyline_block(self):
+        """Tests that polylines are split into segments at each -1."""
+        parser = parsers.VRMLParser(None)
+        block = 'coord Coordinate { point [ 0 0 0, 1 0 0, 2 0 0, 0 1 0, 0 2 0, 0 3 0, ] } ' \
+                'coordIndex [ 0, 1, 2, -1, 3, 4, -1, -1, 5, ]'
+        points, lines, lengths, color = parser.process_polyline_block(block)
+        self.assertEqual(lines.tolist(), [2, 0, 1, 2, 1, 2, 2, 3, 4])
+        self.assertEqual(lengths.tolist(), [2, 2, 2])
+
+    def test_combine_mesh_arrays(self):
+        """Tests that cells of mixed sizes are shifted by the point offsets."""
+        parser = parsers.VRMLParser(None)
+        points = [np.zeros((4, 3)), np.zeros((5, 3))]
+        cells = [np.array([3, 0, 1, 2, 4, 0, 1, 2, 3]), np.array([2, 0, 1, 3, 2, 3, 4])]
+        colors = [np.zeros((9, 3))]
+        _, combined, _ = parser.combine_mesh_arrays(points, cells, colors)
+        self.assertEqual(combined.tolist(), [3, 0, 1, 2, 4, 0, 1, 2, 3, 2, 4, 5, 3, 6, 7, 8])
+        lengths = [np.array([3, 4]), np.array([2, 3])]
+        _, combined_lengths, _ = parser.combine_mesh_arrays(points, cells, colors, lengths)
+        self.assertEqual(combined_lengths.tolist(), combined.tolist())
+
     def test_find_overlaps(self):
         """Tests the find_overlaps method."""
         self.gev.off_screen = True
@@ -47,6 +175,33 @@ class TestGeViewer(unittest.TestCase):
         # one overlap between two components
         self.assertEqual(len(self.gev.find_overlaps(tolerance=0.01, n_samples=10000)), 2)
 
+    def test_sample_bounds(self):
+        """Tests that exactly the requested number of samples is drawn inside the box."""
+        for n_samples in [1, 2000, 10000]:
+            points = self.gev.sample_bounds((0, 1, 0, 2, -1, 0), n_samples)
+            self.assertEqual(points.shape, (n_samples, 3))
+            self.assertTrue(np.all(points >= [0, 0, -1]) and np.all(points <= [1, 2, 0]))
+
+    def test_find_candidate_pairs(self):
+        """Tests the find_candidate_pairs method against the pairwise bounds checks."""
+        rng = np.random.default_rng(0)
+        # the second set of boxes overlaps much less along y than along x
+        for scale in [(4, 4, 4), (20, 0.5, 4)]:
+            low = rng.uniform(0, 10, (40, 3))
+            high = low + rng.uniform(0.1, 1, (40, 3))*scale
+            bounds = np.stack([low, high], axis=2).reshape(-1, 6)
+            meshes = [pv.Box(bounds=b) for b in bounds]
+            expected = [(i, j) for i in range(len(meshes)) for j in range(i + 1, len(meshes)) \
+                        if self.gev.do_bounds_overlap(meshes[i], meshes[j]) \
+                        and not self.gev.is_mesh_inside(meshes[i], meshes[j]) \
+                        and not self.gev.is_mesh_inside(meshes[j], meshes[i])]
+            # small batches should give the same pairs
+            for max_pairs in [1 << 20, 5, 1]:
+                first, second = self.gev.find_candidate_pairs(bounds, max_pairs=max_pairs)
+                self.assertEqual(list(zip(first.tolist(), second.tolist())), expected)
+        first, second = self.gev.find_candidate_pairs(np.zeros((0, 6)))
+        self.assertEqual(len(first), 0)
+
     def test_count_components(self):
         """Tests the count_components method."""
         self.gev.off_screen = True